@@ -0,0 +1,63 @@
+# game_server/benchmarks/micro.py
+
+import random
+import timeit
+from typing import Any, Callable, Dict, List
+
+from game.vector import Vector2D
+from game.models import Agent
+from game.behaviors import AwarenessSystem
+from game.world.world import World
+from game.world.wall import Wall
+from game.physics.collision import circle_wall_collision
+from game.physics.spatial_grid import SpatialGrid
+
+def _time(fn: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    """Best-of-repeat microseconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+def _make_agents(world: World, count: int, seed: int = 7) -> List[Agent]:
+    random.seed(seed)
+    return [
+        Agent(
+            team="red" if i % 2 else "blue",
+            position=Vector2D(random.uniform(0, 800), random.uniform(0, 600)),
+            world=world,
+            bounds=(0, 0, 800, 600)
+        )
+        for i in range(count)
+    ]
+
+def run_micro_benchmarks(number: int = 20000) -> Dict[str, float]:
+    """Hot-path micro-benchmarks; values are microseconds per call"""
+    results: Dict[str, float] = {}
+
+    a = Vector2D(3.0, 4.0)
+    b = Vector2D(-1.5, 2.25)
+    results["vector_add"] = _time(lambda: a + b, number)
+    results["vector_sub"] = _time(lambda: a - b, number)
+    results["vector_magnitude"] = _time(a.magnitude, number)
+    results["vector_normalize"] = _time(a.normalize, number)
+    results["vector_limit"] = _time(lambda: a.limit(2.0), number)
+
+    wall = Wall(position=Vector2D(100, 100), width=50, height=50)
+    hit = Vector2D(95, 120)
+    miss = Vector2D(300, 300)
+    results["circle_wall_collision_hit"] = _time(lambda: circle_wall_collision(hit, 10, wall), number)
+    results["circle_wall_collision_miss"] = _time(lambda: circle_wall_collision(miss, 10, wall), number)
+
+    world = World()
+    world.generate_world(800, 600)
+    results["world_check_collisions"] = _time(lambda: world.check_collisions(hit, 10), number)
+
+    agents = _make_agents(world, 200)
+    awareness = AwarenessSystem()
+    grid = SpatialGrid(awareness.max_range)
+    grid.rebuild(agents)
+    subject = agents[0]
+    zone_number = max(100, number // 100)
+    results["awareness_zones_200_linear"] = _time(lambda: awareness.get_agents_by_zone(subject, agents), zone_number)
+    results["awareness_zones_200_grid"] = _time(lambda: awareness.get_agents_by_zone(subject, agents, grid), zone_number)
+
+    results["agent_to_dict"] = _time(subject.to_dict, number)
+    return results
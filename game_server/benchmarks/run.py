@@ -0,0 +1,79 @@
+# game_server/benchmarks/run.py
+"""
+Headless simulation benchmarks.
+
+Run from the game_server directory:
+    python -m benchmarks.run                  # micro + standard + scaling
+    python -m benchmarks.run --suite scaling --agents 50 500 5000
+    python -m benchmarks.run --output results.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+from loguru import logger
+
+from .micro import run_micro_benchmarks
+from .scenarios import Scenario, run_scenario, scaling_scenarios, standard_scenarios
+
+def _print_scenario(result: Dict[str, Any]) -> None:
+    tick = result["tick_ms"]
+    memory = result.get("peak_memory_mb")
+    print(
+        f"{result['scenario']['name']:<16} "
+        f"agents={result['scenario']['agents']:<6} walls={result['walls']:<4} "
+        f"tps={result['ticks_per_second']:8.1f} "
+        f"p50={tick['p50']:8.2f}ms p99={tick['p99']:8.2f}ms"
+        + (f" mem={memory:7.1f}MB" if memory is not None else "")
+    )
+
+def run(suite: str, agent_counts: List[int], measure_memory: bool) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform()
+    }
+
+    if suite in ("all", "micro"):
+        print("== micro (us/call) ==")
+        results["micro"] = run_micro_benchmarks()
+        for name, value in results["micro"].items():
+            print(f"{name:<32} {value:10.3f}")
+
+    scenarios: List[Scenario] = []
+    if suite in ("all", "standard"):
+        scenarios += standard_scenarios()
+    if suite in ("all", "scaling"):
+        scenarios += scaling_scenarios(agent_counts)
+
+    if scenarios:
+        print("== scenarios ==")
+        results["scenarios"] = []
+        for scenario in scenarios:
+            result = run_scenario(scenario, measure_memory=measure_memory)
+            results["scenarios"].append(result)
+            _print_scenario(result)
+
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless game simulation benchmarks")
+    parser.add_argument("--suite", choices=["all", "micro", "standard", "scaling"], default="all")
+    parser.add_argument("--agents", type=int, nargs="+", help="Agent counts for the scaling sweep")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory pass")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write JSON results")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = run(args.suite, args.agents, measure_memory=not args.no_memory)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# game_server/benchmarks/scenarios.py
+
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from game.state_manager import GameState
+from game.behaviors import BehaviorContext, BehaviorType, DecisionMaker
+from game.world.wall import Wall
+from game.vector import Vector2D
+from game.profiler import profiler
+from game.timing import RollingWindow
+from game.constants import UPDATE_INTERVAL
+
+class FixedDecisionMaker(DecisionMaker):
+    """DecisionMaker that always picks the same behavior"""
+    def __init__(self, behavior_type: BehaviorType):
+        super().__init__()
+        self.behavior_type = behavior_type
+
+    def evaluate(self, context: BehaviorContext) -> BehaviorType:
+        return self.behavior_type
+
+@dataclass
+class Scenario:
+    """Scripted headless match setup"""
+    name: str
+    agents: int = 100
+    extra_walls: int = 0
+    red_ratio: float = 0.5
+    # Share of agents pinned to a behavior; the rest use the normal DecisionMaker
+    behavior_mix: Dict[str, float] = field(default_factory=dict)
+    ticks: int = 120
+    warmup_ticks: int = 10
+    seed: int = 1234
+
+def build_game_state(scenario: Scenario) -> GameState:
+    """Create a running GameState populated according to the scenario"""
+    random.seed(scenario.seed)
+    game_state = GameState()
+    world = game_state.world_state.world
+    min_x, min_y, max_x, max_y = game_state.world_state.bounds
+
+    extra_walls = []
+    for i in range(scenario.extra_walls):
+        width = random.uniform(10, 60)
+        height = random.uniform(10, 60)
+        extra_walls.append(Wall(
+            position=Vector2D(random.uniform(min_x, max_x - width), random.uniform(min_y, max_y - height)),
+            width=width,
+            height=height,
+            name=f"Bench-{i + 1}"
+        ))
+    if extra_walls:
+        world.add_walls(extra_walls, background=False)
+
+    red_count = int(round(scenario.agents * scenario.red_ratio))
+    for i in range(scenario.agents):
+        game_state.add_agent("red" if i < red_count else "blue")
+
+    # Pin behaviors according to the mix
+    agents = game_state.agent_state.get_agents_list()
+    random.shuffle(agents)
+    start = 0
+    for behavior_name, share in scenario.behavior_mix.items():
+        behavior_type = BehaviorType[behavior_name.upper()]
+        count = int(round(len(agents) * share))
+        for agent in agents[start:start + count]:
+            agent.behavior_system.decision_maker = FixedDecisionMaker(behavior_type)
+        start += count
+
+    game_state.is_running = True
+    return game_state
+
+def run_scenario(scenario: Scenario, measure_memory: bool = True) -> Dict[str, Any]:
+    """Drive GameState.update directly and collect timing and memory figures"""
+    game_state = build_game_state(scenario)
+    for _ in range(scenario.warmup_ticks):
+        game_state.update(UPDATE_INTERVAL)
+
+    profiler.reset()
+    tick_times = RollingWindow(scenario.ticks)
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(scenario.ticks):
+        tick_start = time.perf_counter()
+        game_state.update(UPDATE_INTERVAL)
+        tick_times.record(time.perf_counter() - tick_start)
+    elapsed = time.perf_counter() - start
+    phases = profiler.snapshot()
+
+    result: Dict[str, Any] = {
+        "scenario": asdict(scenario),
+        "walls": len(game_state.world_state.world.walls),
+        "agents_end": len(game_state.agents),
+        "ticks_per_second": scenario.ticks / elapsed if elapsed > 0 else 0.0,
+        "tick_ms": {k: v * 1000 for k, v in tick_times.percentiles((50, 99)).items()},
+        "phase_p50_ms": {name: h["p50"] for name, h in phases["histograms_ms"].items()},
+        "counters_per_tick": {name: value / scenario.ticks for name, value in phases["counters"].items()},
+        "realtime_capable": tick_times.percentile(99) <= UPDATE_INTERVAL
+    }
+
+    if measure_memory:
+        result["peak_memory_mb"] = measure_peak_memory(scenario)
+    return result
+
+def measure_peak_memory(scenario: Scenario, ticks: int = 10) -> float:
+    """Peak traced allocation (MB) for building the scenario and a few ticks"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        game_state = build_game_state(scenario)
+        for _ in range(ticks):
+            game_state.update(UPDATE_INTERVAL)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+def scaling_scenarios(agent_counts: Optional[List[int]] = None) -> List[Scenario]:
+    """Agent count sweep; tick count shrinks as matches grow"""
+    counts = agent_counts or [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    return [
+        Scenario(
+            name=f"agents-{count}",
+            agents=count,
+            ticks=max(10, min(300, 30000 // count)),
+            warmup_ticks=min(10, max(2, 2000 // count))
+        )
+        for count in counts
+    ]
+
+def standard_scenarios() -> List[Scenario]:
+    """Fixed scenarios covering walls, team balance and behavior mix"""
+    return [
+        Scenario(name="walls-0", agents=500),
+        Scenario(name="walls-100", agents=500, extra_walls=100),
+        Scenario(name="walls-500", agents=500, extra_walls=500),
+        Scenario(name="teams-90-10", agents=500, red_ratio=0.9),
+        Scenario(name="mix-wander", agents=500, behavior_mix={"wander": 1.0}),
+        Scenario(name="mix-attack", agents=500, behavior_mix={"attack": 1.0}),
+        Scenario(name="mix-flee", agents=500, behavior_mix={"flee": 1.0}),
+        Scenario(name="mix-balanced", agents=500,
+                 behavior_mix={"wander": 0.25, "wander_together": 0.25, "attack": 0.25, "flee": 0.25}),
+    ]
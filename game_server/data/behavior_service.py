@@ -15,7 +15,7 @@ class BehaviorService:
             behavior_data['created_at'] = datetime.utcnow()
             behavior_data['updated_at'] = datetime.utcnow()
             
-            result = self.db.behaviors.insert_one(behavior_data)
+            result = await self.db.run(self.db.behaviors.insert_one, behavior_data)
             logger.info(f"Saved behavior with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -25,7 +25,7 @@ class BehaviorService:
 
     async def get_behavior(self, behavior_id: str) -> dict:
         try:
-            behavior = self.db.behaviors.find_one({"_id": self.db.to_object_id(behavior_id)})
+            behavior = await self.db.run(self.db.behaviors.find_one, {"_id": self.db.to_object_id(behavior_id)})
             return self.db.format_id(behavior)
             
         except Exception as e:
@@ -34,11 +34,10 @@ class BehaviorService:
 
     async def list_behaviors(self) -> List[Dict[str, Any]]:
         try:
-            behaviors = []
-            cursor = self.db.behaviors.find().sort('created_at', -1)
-            for behavior in cursor:
-                behaviors.append(self.db.format_id(behavior))
-            return behaviors
+            behaviors = await self.db.run(
+                lambda: list(self.db.behaviors.find().sort('created_at', -1))
+            )
+            return [self.db.format_id(behavior) for behavior in behaviors]
             
         except Exception as e:
             logger.error(f"Error listing behaviors: {str(e)}")
@@ -48,7 +47,8 @@ class BehaviorService:
         try:
             updates['updated_at'] = datetime.utcnow()
             
-            result = self.db.behaviors.update_one(
+            result = await self.db.run(
+                self.db.behaviors.update_one,
                 {"_id": self.db.to_object_id(behavior_id)},
                 {"$set": updates}
             )
@@ -60,7 +60,7 @@ class BehaviorService:
 
     async def delete_behavior(self, behavior_id: str) -> bool:
         try:
-            result = self.db.behaviors.delete_one({"_id": self.db.to_object_id(behavior_id)})
+            result = await self.db.run(self.db.behaviors.delete_one, {"_id": self.db.to_object_id(behavior_id)})
             logger.info(f"Deleted behavior {behavior_id}: {result.deleted_count} document(s) deleted")
             return result.deleted_count > 0
             
@@ -1,22 +1,47 @@
 # game_server/data/config_service.py
+import copy
+import os
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from .db_connector import DatabaseConnector
+from .cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cached config documents and per-user listings
+CONFIG_CACHE_SIZE = int(os.getenv('CONFIG_CACHE_SIZE', '256'))
+# Seconds before a cached entry is re-read, bounding staleness from other writers
+CONFIG_CACHE_TTL = float(os.getenv('CONFIG_CACHE_TTL', '30'))
+
 class ConfigService:
+    # Shared by every instance so all game states and clients hit one cache
+    cache = TTLCache(CONFIG_CACHE_SIZE, CONFIG_CACHE_TTL)
+    _watch_thread: Optional[threading.Thread] = None
+    _watch_stream = None
+    _watch_stopped = False
+
     def __init__(self):
         self.db = DatabaseConnector()
 
+    @classmethod
+    def invalidate(cls, config_id: Optional[str] = None) -> None:
+        """Drop a config (or every config if None) plus the default and listings"""
+        if config_id is None:
+            cls.cache.clear()
+            return
+        cls.cache.pop(("config", str(config_id)))
+        cls.cache.pop_where(lambda key: key[0] in ("default", "list"))
+
     async def save_config(self, config_data: dict, user_id: str) -> str:
         try:
             config_data['created_at'] = datetime.utcnow()
             config_data['updated_at'] = datetime.utcnow()
             config_data['user_id'] = user_id  # Add user_id to config
             
-            result = self.db.configs.insert_one(config_data)
+            result = await self.db.run(self.db.configs.insert_one, config_data)
+            self.invalidate(result.inserted_id)
             logger.info(f"Saved config with ID: {result.inserted_id}")
             return str(result.inserted_id)
             
@@ -28,8 +53,14 @@ class ConfigService:
 
     async def get_config(self, config_id: str) -> Optional[Dict[str, Any]]:
         try:
-            config = self.db.configs.find_one({"_id": self.db.to_object_id(config_id)})
-            return self.db.format_id(config)
+            object_id = self.db.to_object_id(config_id)
+
+            async def load() -> Optional[Dict[str, Any]]:
+                config = await self.db.run(self.db.configs.find_one, {"_id": object_id})
+                return self.db.format_id(config)
+
+            config = await self.cache.get_or_load(("config", str(object_id)), load)
+            return copy.deepcopy(config)
             
         except Exception as e:
             logger.error(f"Error retrieving config: {str(e)}")
@@ -42,11 +73,14 @@ class ConfigService:
             if user_id:
                 query["$or"].append({"user_id": user_id})
 
-            configs = []
-            cursor = self.db.configs.find(query).sort('created_at', -1)
-            for config in cursor:
-                configs.append(self.db.format_id(config))
-            return configs
+            async def load() -> List[Dict[str, Any]]:
+                configs = await self.db.run(
+                    lambda: list(self.db.configs.find(query).sort('created_at', -1))
+                )
+                return [self.db.format_id(config) for config in configs]
+
+            configs = await self.cache.get_or_load(("list", user_id), load)
+            return copy.deepcopy(configs)
             
         except Exception as e:
             logger.error(f"Error listing configs: {str(e)}")
@@ -58,10 +92,12 @@ class ConfigService:
         try:
             updates['updated_at'] = datetime.utcnow()
             
-            result = self.db.configs.update_one(
+            result = await self.db.run(
+                self.db.configs.update_one,
                 {"_id": self.db.to_object_id(config_id)},
                 {"$set": updates}
             )
+            self.invalidate(config_id)
             return result.modified_count > 0
             
         except Exception as e:
@@ -71,11 +107,12 @@ class ConfigService:
     async def delete_config(self, config_id: str, user_id: str) -> bool:
         try:
             # Only allow deletion if config belongs to user and is not default
-            result = self.db.configs.delete_one({
+            result = await self.db.run(self.db.configs.delete_one, {
                 "_id": self.db.to_object_id(config_id),
                 "user_id": user_id,
                 "is_default": {"$ne": True}
             })
+            self.invalidate(config_id)
             logger.info(f"Deleted config {config_id}: {result.deleted_count} document(s) deleted")
             return result.deleted_count > 0
             
@@ -85,10 +122,53 @@ class ConfigService:
 
     async def get_default_config(self) -> Optional[Dict[str, Any]]:
         try:
-            config = self.db.configs.find_one({"is_default": True})
-            return self.db.format_id(config)
+            async def load() -> Optional[Dict[str, Any]]:
+                config = await self.db.run(self.db.configs.find_one, {"is_default": True})
+                return self.db.format_id(config)
+
+            config = await self.cache.get_or_load(("default",), load)
+            return copy.deepcopy(config)
         except Exception as e:
             logger.error(f"Error retrieving default config: {str(e)}")
             raise
 
+    def start_change_watch(self) -> None:
+        """
+        Invalidate cached configs when the collection changes, including
+        writes from other processes. Needs a replica set (change streams);
+        on a standalone server the watcher logs and exits, leaving the TTL.
+        """
+        cls = type(self)
+        if cls._watch_thread is not None and cls._watch_thread.is_alive():
+            return
+        cls._watch_stopped = False
+        cls._watch_thread = threading.Thread(
+            target=self._watch_changes,
+            name="config-change-watch",
+            daemon=True
+        )
+        cls._watch_thread.start()
+
+    def _watch_changes(self) -> None:
+        cls = type(self)
+        try:
+            with self.db.configs.watch() as stream:
+                cls._watch_stream = stream
+                for change in stream:
+                    document_key = change.get('documentKey') or {}
+                    self.invalidate(document_key.get('_id'))
+        except Exception as e:
+            if not cls._watch_stopped:
+                logger.warning(f"Config change watch stopped: {str(e)}")
+        finally:
+            cls._watch_stream = None
 
+    @classmethod
+    def stop_change_watch(cls) -> None:
+        cls._watch_stopped = True
+        stream, cls._watch_stream = cls._watch_stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
@@ -1,29 +1,65 @@
 # game_server/data/db_connector.py
 from pymongo import MongoClient
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
 import logging
-from typing import Optional
+from typing import Any, Callable, Optional, TypeVar
 from bson import ObjectId
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Connections pymongo may open to the server
+DB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '10'))
+# Threads running blocking driver calls; bounds concurrent queries
+DB_EXECUTOR_WORKERS = int(os.getenv('MONGODB_EXECUTOR_WORKERS', '4'))
+
 class DatabaseConnector:
+    """
+    Process-wide MongoDB access: one pooled MongoClient shared by every
+    service. pymongo blocks, so services await run(), which executes the
+    driver call on a small thread pool instead of the event loop.
+    """
+    _instance: Optional['DatabaseConnector'] = None
 
-    # def __new__(cls):
-    #     if cls._instance is None:
-    #         cls._instance = super().__new__(cls)
-    #     return cls._instance
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __init__(self):
         if not hasattr(self, 'client'):
-            self.client = MongoClient(os.getenv('MONGODB_URI'))
+            self.client = MongoClient(os.getenv('MONGODB_URI'), maxPoolSize=DB_MAX_POOL_SIZE)
+            self.executor = ThreadPoolExecutor(
+                max_workers=DB_EXECUTOR_WORKERS,
+                thread_name_prefix="mongodb"
+            )
             self.db = self.client.agent_game
             self.behaviors = self.db.behaviors
             self.configs = self.db.configs
             self.users = self.db.users  # Add users collection
 
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking driver call on the database thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    @classmethod
+    def close(cls) -> None:
+        """Shut down the shared client and thread pool (on server shutdown)"""
+        instance = cls._instance
+        if instance is None:
+            return
+        cls._instance = None
+        instance.executor.shutdown(wait=True, cancel_futures=True)
+        instance.client.close()
+        logger.info("Closed database connection pool")
+
     @staticmethod
     def format_id(doc: dict) -> dict:
         if doc and '_id' in doc:
@@ -36,4 +72,4 @@ class DatabaseConnector:
             return ObjectId(id_str)
         except Exception as e:
             logger.error(f"Invalid ObjectId format: {id_str}")
-            raise ValueError(f"Invalid ID format: {id_str}")
\ No newline at end of file
+            raise ValueError(f"Invalid ID format: {id_str}")
@@ -0,0 +1,137 @@
+# game_server/data/telemetry_service.py
+import asyncio
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from .db_connector import DatabaseConnector
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Records per bulk insert; reaching it triggers an early flush
+TELEMETRY_BATCH_SIZE = int(os.getenv('TELEMETRY_BATCH_SIZE', '500'))
+# Seconds between flushes when the batch size is not reached
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv('TELEMETRY_FLUSH_INTERVAL', '2'))
+# Records buffered per collection before the oldest are dropped
+TELEMETRY_MAX_BUFFERED = int(os.getenv('TELEMETRY_MAX_BUFFERED', '10000'))
+# Longest wait between retries while the database is unreachable
+TELEMETRY_MAX_BACKOFF = 30.0
+# Raised for a document whose _id is already stored (written by an earlier attempt)
+DUPLICATE_KEY_ERROR = 11000
+
+class TelemetryWriter:
+    """
+    Write-behind persistence for match telemetry.
+    The simulation calls record(), which only appends to a bounded
+    per-collection buffer; a background task drains the buffers with bulk
+    inserts on size or time thresholds. When the database falls behind the
+    buffers fill up and the oldest records are dropped (and counted), so
+    the game loop never waits on storage.
+    """
+
+    def __init__(self, batch_size: int = TELEMETRY_BATCH_SIZE,
+                 flush_interval: float = TELEMETRY_FLUSH_INTERVAL,
+                 max_buffered: int = TELEMETRY_MAX_BUFFERED):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.written = 0
+        self.dropped = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, collection: str, document: Dict[str, Any]) -> None:
+        """Buffer a document for insertion into collection (never blocks)"""
+        buffer = self.buffers.get(collection)
+        if buffer is None:
+            buffer = self.buffers[collection] = deque(maxlen=self.max_buffered)
+        if len(buffer) == self.max_buffered:
+            self.dropped += 1
+        document.setdefault('recorded_at', datetime.utcnow())
+        # A fixed _id makes retrying a partly written batch idempotent
+        document.setdefault('_id', ObjectId())
+        buffer.append(document)
+        if len(buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(buffer) for buffer in self.buffers.values())
+
+    def start(self) -> None:
+        """Start the background flusher (needs a running event loop)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write what is still buffered"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except Exception as e:
+            logger.warning(f"Telemetry not fully flushed on shutdown ({self.pending} records): {str(e)}")
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                backoff = self.flush_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                backoff = min(backoff * 2, TELEMETRY_MAX_BACKOFF)
+                logger.warning(f"Telemetry flush failed, retrying in {backoff:.1f}s: {str(e)}")
+
+    async def flush(self) -> None:
+        """Bulk insert everything buffered, one batch at a time"""
+        db = DatabaseConnector()
+        # record() may add collections while a batch is being written
+        for collection, buffer in list(self.buffers.items()):
+            while buffer:
+                batch: List[Dict[str, Any]] = [
+                    buffer.popleft() for _ in range(min(self.batch_size, len(buffer)))
+                ]
+                try:
+                    await db.run(db.db[collection].insert_many, batch, ordered=False)
+                except BulkWriteError as e:
+                    # Unordered inserts write what they can; retry only the rest
+                    failed = {
+                        error['index'] for error in e.details.get('writeErrors', [])
+                        if error.get('code') != DUPLICATE_KEY_ERROR
+                    }
+                    self.written += len(batch) - len(failed)
+                    if failed:
+                        self._requeue(buffer, [batch[i] for i in sorted(failed)])
+                        raise
+                    continue
+                except BaseException:
+                    self._requeue(buffer, batch)
+                    raise
+                self.written += len(batch)
+
+    def _requeue(self, buffer: Deque[Dict[str, Any]], batch: List[Dict[str, Any]]) -> None:
+        """Put a batch back (oldest first) unless newer records filled the buffer"""
+        room = self.max_buffered - len(buffer)
+        keep = batch[-room:] if room > 0 else []
+        self.dropped += len(batch) - len(keep)
+        buffer.extendleft(reversed(keep))
+
+# Process-wide writer shared by every game state
+telemetry = TelemetryWriter()
@@ -12,7 +12,7 @@ class UserService:
 
     async def get_or_create_default_user(self) -> Dict[str, Any]:
         try:
-            default_user = self.db.users.find_one({"is_default": True})
+            default_user = await self.db.run(self.db.users.find_one, {"is_default": True})
             if not default_user:
                 default_user = {
                     "username": "default_user",
@@ -24,7 +24,7 @@ class UserService:
                         "notifications": True
                     }
                 }
-                result = self.db.users.insert_one(default_user)
+                result = await self.db.run(self.db.users.insert_one, default_user)
                 default_user['_id'] = result.inserted_id
                 logger.info(f"Created default user with ID: {result.inserted_id}")
             
@@ -36,7 +36,7 @@ class UserService:
 
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            user = self.db.users.find_one({"_id": self.db.to_object_id(user_id)})
+            user = await self.db.run(self.db.users.find_one, {"_id": self.db.to_object_id(user_id)})
             return self.db.format_id(user)
         except Exception as e:
             logger.error(f"Error retrieving user: {str(e)}")
@@ -1,12 +1,18 @@
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from loguru import logger
 from .vector import Vector2D
 from .models import Agent
-from .behaviors import BehaviorSystem, BaseBehavior, BehaviorContext, AwarenessSystem, WanderBehavior, WanderTogetherBehavior, AttackBehavior, FleeBehavior
-import math
-import random
+from .behaviors import BehaviorSystem, BaseBehavior, BehaviorContext, BehaviorBatch, AwarenessSystem, WanderBehavior, WanderTogetherBehavior, AttackBehavior, FleeBehavior
+from .physics.spatial_grid import SpatialGrid
+from .constants import BEHAVIOR_CACHE_SIZE
+from .sandbox.compiler import compile_behavior
+from .sandbox.pool import BehaviorSandbox
+from .sandbox.profiling import profile_behavior
+import hashlib
 class BehaviorManager:
-    def __init__(self):
+    def __init__(self, cache_size: int = BEHAVIOR_CACHE_SIZE,
+                 sandbox: Optional[BehaviorSandbox] = None):
         self.default_behaviors = {
             "wander": WanderBehavior(),
             "wander_together": WanderTogetherBehavior(),
@@ -15,8 +21,15 @@ class BehaviorManager:
         }
         self.custom_behaviors: Dict[str, str] = {}  # Maps behavior ID -> behavior code
         self.agent_behaviors: Dict[str, str] = {}   # Maps agent ID -> behavior ID
+        self.behavior_hashes: Dict[str, str] = {}   # Maps behavior ID -> source hash
+        self.behavior_profiles: Dict[str, Dict[str, Any]] = {}  # Maps behavior ID -> trial profile
+        # (behavior ID, source hash) -> compiled behavior instance, LRU ordered
+        self.cache_size = cache_size
+        self._compiled: "OrderedDict[Tuple[str, str], BaseBehavior]" = OrderedDict()
+        # Worker processes for custom code; None runs it inline
+        self.sandbox = sandbox
 
-    def get_available_behaviors(self) -> List[Dict[str, str]]:
+    def get_available_behaviors(self) -> List[Dict[str, Any]]:
         """Fetch all behaviors (default + custom)."""
         behaviors = []
         for behavior_name in self.default_behaviors:
@@ -31,21 +44,79 @@ class BehaviorManager:
                 "name": f"Custom Behavior {behavior_id}",
                 "type": "custom",
                 "code": code,
+                "profile": self.behavior_profiles.get(behavior_id),
             })
         return behaviors
 
-    def add_behavior(self, behavior_id: str, behavior_code: str) -> bool:
-        """Add or update a custom behavior."""
+    def profile_behavior(self, behavior_id: str, behavior_code: str) -> Dict[str, Any]:
+        """Measure a behavior in a headless trial match (blocking, runs in a subprocess)"""
+        return profile_behavior(behavior_id, behavior_code)
+
+    def add_behavior(self, behavior_id: str, behavior_code: str,
+                     profile: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Add or update a custom behavior, compiling it ahead of the first tick.
+        A trial profile with status "rejected" refuses the code.
+        """
+        if profile is not None and profile.get("status") == "rejected":
+            logger.error(f"Behavior {behavior_id} rejected by trial: {profile.get('reason')}")
+            return False
         try:
-            # Validate the behavior code if needed
-            # For example, check if it's valid Python or matches expected behavior format.
+            source_hash = self._source_hash(behavior_code)
+            if self.sandbox is not None:
+                # Syntax check only: user code must not run in this process
+                compile(behavior_code, f"<behavior {behavior_id}>", "exec")
+                behavior = None
+            else:
+                # Compile before storing so broken code is rejected up front
+                behavior = self._compile_behavior(behavior_id, behavior_code)
+            self.invalidate(behavior_id)
             self.custom_behaviors[behavior_id] = behavior_code
+            self.behavior_hashes[behavior_id] = source_hash
+            if profile is not None:
+                self.behavior_profiles[behavior_id] = profile
+                if profile.get("status") == "heavy":
+                    logger.warning(f"Behavior {behavior_id} is heavy: {profile.get('reason')}")
+            else:
+                self.behavior_profiles.pop(behavior_id, None)
+            if behavior is not None:
+                self._cache_put((behavior_id, source_hash), behavior)
             logger.info(f"Custom behavior {behavior_id} added/updated.")
             return True
         except Exception as e:
             logger.error(f"Failed to add behavior {behavior_id}: {e}")
             return False
 
+    def invalidate(self, behavior_id: str) -> None:
+        """Drop every compiled version of a behavior"""
+        for key in [key for key in self._compiled if key[0] == behavior_id]:
+            del self._compiled[key]
+        if self.sandbox is not None:
+            self.sandbox.forget_behavior(behavior_id)
+
+    def has_assigned_behavior(self, agent_id: str) -> bool:
+        return agent_id in self.agent_behaviors
+
+    def remove_agent(self, agent_id: str) -> None:
+        """Forget the assignment of an agent that left the game"""
+        self.agent_behaviors.pop(agent_id, None)
+        if self.sandbox is not None:
+            self.sandbox.forget_agent(agent_id)
+
+    def begin_tick(self) -> None:
+        """Pick up custom behavior results computed since the last tick"""
+        if self.sandbox is not None:
+            self.sandbox.collect()
+
+    def end_tick(self) -> None:
+        """Hand this tick's custom behavior work to the sandbox"""
+        if self.sandbox is not None:
+            self.sandbox.dispatch()
+
+    def shutdown(self) -> None:
+        if self.sandbox is not None:
+            self.sandbox.shutdown()
+
     def assign_behavior_to_agent(self, agent_id: str, behavior_id: str) -> bool:
         """Assign a behavior to an agent."""
         if behavior_id in self.default_behaviors or behavior_id in self.custom_behaviors:
@@ -59,7 +130,8 @@ class BehaviorManager:
         """Get the behavior ID currently assigned to an agent."""
         return self.agent_behaviors.get(agent_id)
 
-    def execute_behavior(self, agent: Agent, nearby_agents: List[Agent]) -> Vector2D:
+    def execute_behavior(self, agent: Agent, nearby_agents: List[Agent],
+                         spatial_grid: Optional[SpatialGrid] = None) -> Vector2D:
         """Execute the behavior assigned to an agent."""
         behavior_id = self.get_agent_behavior(agent.id)
         if not behavior_id:
@@ -67,45 +139,137 @@ class BehaviorManager:
             behavior = self.default_behaviors["wander"]
         elif behavior_id in self.default_behaviors:
             behavior = self.default_behaviors[behavior_id]
+        elif self.sandbox is not None:
+            behavior = None
         else:
-            behavior_code = self.custom_behaviors.get(behavior_id)
-            if not behavior_code:
-                logger.warning(f"Custom behavior {behavior_id} not found. Defaulting to 'wander'.")
-                behavior = self.default_behaviors["wander"]
-            else:
-                # Dynamically execute the custom behavior
-                behavior = self._compile_and_execute_behavior(behavior_code, agent, nearby_agents)
+            behavior = self._get_custom_behavior(behavior_id)
         
-        # Prepare the context
-        awareness = AwarenessSystem()  # or use the existing instance
-        agents_by_zone = awareness.get_agents_by_zone(agent, nearby_agents)
+        # Prepare the context with the agent's own awareness zones
+        awareness = agent.behavior_system.awareness
+        agents_by_zone = awareness.get_agents_by_zone(agent, nearby_agents, spatial_grid)
+        if behavior is None:
+            return self._execute_sandboxed(agent, behavior_id, agents_by_zone)
+
         context = BehaviorContext(
             agent=agent,
             agents_by_zone=agents_by_zone,
             current_behavior=behavior_id,  # Use the string ID for clarity
             time_in_behavior=0,  # Could be tracked elsewhere
         )
-        return behavior.execute(context)
+        try:
+            return behavior.execute(context)
+        except Exception as e:
+            logger.error(f"Error executing behavior {behavior_id} for agent {agent.id}: {e}")
+            return self.default_behaviors["wander"].execute(context)
+
+    def execute_behaviors(self, agents: List[Agent],
+                          spatial_grid: SpatialGrid) -> Dict[str, Vector2D]:
+        """
+        Execute assigned behaviors for many agents, grouped by behavior ID.
+        Custom behaviors defining execute_batch(batch) are called once per
+        group with a BehaviorBatch; everything else runs per agent.
+        """
+        groups: Dict[str, List[Agent]] = {}
+        for agent in agents:
+            behavior_id = self.get_agent_behavior(agent.id)
+            if behavior_id:
+                groups.setdefault(behavior_id, []).append(agent)
+
+        forces: Dict[str, Vector2D] = {}
+        for behavior_id, group in groups.items():
+            behavior = None
+            if behavior_id not in self.default_behaviors and self.sandbox is None:
+                behavior = self._get_custom_behavior(behavior_id)
+            if behavior is not None and hasattr(behavior, "execute_batch"):
+                batch_forces = self._execute_batch(behavior_id, behavior, group, spatial_grid)
+                if batch_forces is not None:
+                    forces.update(batch_forces)
+                    continue
 
-    def _compile_and_execute_behavior(self, behavior_code: str, agent: Agent, nearby_agents: List[Agent]) -> BaseBehavior:
-        """Compile and execute custom behavior code."""
+            # Per agent (sandboxed custom behaviors are batched in the worker)
+            for agent in group:
+                nearby_agents = spatial_grid.get_candidates(
+                    agent.position,
+                    agent.behavior_system.awareness.max_range
+                )
+                forces[agent.id] = self.execute_behavior(agent, nearby_agents, spatial_grid)
+        return forces
+
+    def _execute_batch(self, behavior_id: str, behavior: BaseBehavior, agents: List[Agent],
+                       spatial_grid: SpatialGrid) -> Optional[Dict[str, Vector2D]]:
+        """One execute_batch() call for a group; None falls back to per-agent wander"""
+        neighbors = [
+            spatial_grid.query_radius(agent.position, agent.behavior_system.awareness.max_range, agent.id)
+            for agent in agents
+        ]
+        batch = BehaviorBatch(agents, neighbors)
         try:
-            # Create a local context for execution
-            local_context = {
-                "Vector2D": Vector2D,
-                "math": math,
-                "random": random,
-                "Agent": Agent,
-                "logger": logger,
-                "agent": agent,
-                "nearby_agents": nearby_agents,
+            return dict(zip(batch.ids, batch.to_forces(behavior.execute_batch(batch))))
+        except Exception as e:
+            logger.error(f"Error executing batch behavior {behavior_id}: {e}")
+            wander = self.default_behaviors["wander"]
+            return {
+                agent.id: wander.execute(BehaviorContext(
+                    agent=agent,
+                    agents_by_zone={},
+                    current_behavior=behavior_id,
+                    time_in_behavior=0,
+                ))
+                for agent in agents
             }
-            exec(behavior_code, {}, local_context)
-            behavior_class = local_context.get("CustomBehavior")
-            if not behavior_class:
-                logger.error("Custom behavior does not define 'CustomBehavior' class.")
-                return WanderBehavior()  # Fallback
-            return behavior_class()
+
+    def _execute_sandboxed(self, agent: Agent, behavior_id: str,
+                           agents_by_zone: Dict) -> Vector2D:
+        """Queue a custom behavior in the sandbox; wander until its force arrives"""
+        behavior_code = self.custom_behaviors.get(behavior_id)
+        force = None
+        if behavior_code:
+            force = self.sandbox.queue(
+                agent, behavior_id, self.behavior_hashes[behavior_id],
+                behavior_code, agents_by_zone
+            )
+        if force is not None:
+            return force
+        context = BehaviorContext(
+            agent=agent,
+            agents_by_zone=agents_by_zone,
+            current_behavior=behavior_id,
+            time_in_behavior=0,
+        )
+        return self.default_behaviors["wander"].execute(context)
+
+    @staticmethod
+    def _source_hash(behavior_code: str) -> str:
+        return hashlib.sha256(behavior_code.encode("utf-8")).hexdigest()
+
+    def _cache_put(self, key: Tuple[str, str], behavior: BaseBehavior) -> None:
+        self._compiled[key] = behavior
+        self._compiled.move_to_end(key)
+        while len(self._compiled) > self.cache_size:
+            self._compiled.popitem(last=False)
+
+    def _get_custom_behavior(self, behavior_id: str) -> BaseBehavior:
+        """Compiled custom behavior from the cache, compiling on a miss"""
+        behavior_code = self.custom_behaviors.get(behavior_id)
+        if not behavior_code:
+            logger.warning(f"Custom behavior {behavior_id} not found. Defaulting to 'wander'.")
+            return self.default_behaviors["wander"]
+
+        key = (behavior_id, self.behavior_hashes[behavior_id])
+        behavior = self._compiled.get(key)
+        if behavior is not None:
+            self._compiled.move_to_end(key)
+            return behavior
+
+        try:
+            behavior = self._compile_behavior(behavior_id, behavior_code)
         except Exception as e:
-            logger.error(f"Error executing custom behavior: {e}")
-            return WanderBehavior()  # Fallback
+            # Cache the fallback too, so broken code is not recompiled every tick
+            logger.error(f"Error compiling custom behavior {behavior_id}: {e}")
+            behavior = self.default_behaviors["wander"]
+        self._cache_put(key, behavior)
+        return behavior
+
+    def _compile_behavior(self, behavior_id: str, behavior_code: str) -> BaseBehavior:
+        """Compile custom behavior code and instantiate its CustomBehavior class."""
+        return compile_behavior(behavior_id, behavior_code)
@@ -1,7 +1,10 @@
 from enum import Enum, auto
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any, NamedTuple
+import numpy as np
 from .vector import Vector2D
+from .constants import WALL_AVOID_DISTANCE, NAV_FLEE_LOOKAHEAD
+from .profiler import profiler
 import math
 import random
 from loguru import logger
@@ -10,6 +13,8 @@ from loguru import logger
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .models import Agent
+    from .physics.spatial_grid import SpatialGrid
+    from .world.navigation import NavGrid
 
 class BehaviorType(Enum):
     WANDER = auto()
@@ -51,20 +56,38 @@ class AwarenessSystem:
     def add_zone(self, zone_type: ZoneType, range: float, priority: int):
         """Add or update a zone"""
         self.zones[zone_type] = Zone(zone_type, range, priority)
+
+    @property
+    def max_range(self) -> float:
+        """Largest zone range; used to size spatial grid cells"""
+        return max((zone.range for zone in self.zones.values()), default=0.0)
     
-    def get_agents_by_zone(self, agent: 'Agent', all_agents: List['Agent']) -> Dict[ZoneType, List['Agent']]:
-        """Categorize agents by zones they are in"""
+    def get_agents_by_zone(self, agent: 'Agent', all_agents: List['Agent'],
+                           spatial_grid: Optional['SpatialGrid'] = None) -> Dict[ZoneType, List['Agent']]:
+        """
+        Categorize agents by zones they are in.
+        When a spatial grid is given, only agents in the cells around
+        the agent are considered instead of the full list.
+        """
         result = {zone_type: [] for zone_type in self.zones.keys()}
+        if spatial_grid is not None:
+            all_agents = spatial_grid.get_candidates(agent.position, self.max_range)
+
+        zone_ranges = [(zone_type, zone.range * zone.range) for zone_type, zone in self.zones.items()]
+        profiler.incr("neighbor_checks", len(all_agents))
+        px, py = agent.position.x, agent.position.y
         
         for other in all_agents:
             if other.id == agent.id:
                 continue
                 
-            distance = (other.position - agent.position).magnitude()
+            dx = other.position.x - px
+            dy = other.position.y - py
+            distance_sq = dx * dx + dy * dy
             
             # Add to all applicable zones
-            for zone_type, zone in self.zones.items():
-                if distance <= zone.range:
+            for zone_type, range_sq in zone_ranges:
+                if distance_sq <= range_sq:
                     result[zone_type].append(other)
         
         return result
@@ -122,11 +145,95 @@ class BehaviorContext:
                 not self.can_engage_combat and 
                 self.health_percentage > 50)
 
+# Team codes used in BehaviorBatch.teams
+TEAM_INDEX = {"red": 0, "blue": 1}
+
+class BehaviorBatch:
+    """
+    Every agent running one behavior, as arrays, for execute_batch().
+    Rows 0..N-1 of the world arrays are the agents to steer, in `ids` order;
+    neighbours follow. Neighbours of agent i are world rows
+    neighbor_indices[neighbor_offsets[i]:neighbor_offsets[i + 1]].
+    """
+
+    def __init__(self, agents: List['Agent'], neighbors: List[List['Agent']]):
+        rows: Dict[str, int] = {agent.id: i for i, agent in enumerate(agents)}
+        world = list(agents)
+        indices: List[int] = []
+        offsets = [0]
+        for others in neighbors:
+            for other in others:
+                row = rows.get(other.id)
+                if row is None:
+                    row = rows[other.id] = len(world)
+                    world.append(other)
+                indices.append(row)
+            offsets.append(len(indices))
+
+        self.ids = [agent.id for agent in agents]
+        self.count = len(agents)
+        self.world_positions = np.array([(a.position.x, a.position.y) for a in world], dtype=float).reshape(-1, 2)
+        self.world_velocities = np.array([(a.velocity.x, a.velocity.y) for a in world], dtype=float).reshape(-1, 2)
+        self.world_teams = np.array([TEAM_INDEX.get(a.team, -1) for a in world], dtype=np.int8)
+        self.world_health = np.array([a.combat.health for a in world], dtype=float)
+        self.neighbor_offsets = np.array(offsets, dtype=np.intp)
+        self.neighbor_indices = np.array(indices, dtype=np.intp)
+        self.max_force = np.array([a.movement.max_force for a in agents], dtype=float)
+        self.max_speed = np.array([a.movement.max_speed for a in agents], dtype=float)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.world_positions[:self.count]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        return self.world_velocities[:self.count]
+
+    @property
+    def teams(self) -> np.ndarray:
+        return self.world_teams[:self.count]
+
+    @property
+    def health(self) -> np.ndarray:
+        return self.world_health[:self.count]
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """World rows of the neighbours of agent i"""
+        return self.neighbor_indices[self.neighbor_offsets[i]:self.neighbor_offsets[i + 1]]
+
+    def to_forces(self, forces: Any) -> List[Vector2D]:
+        """Validate an execute_batch() result and convert it to vectors"""
+        forces = np.asarray(forces, dtype=float)
+        if forces.shape != (self.count, 2):
+            raise ValueError(f"execute_batch returned shape {forces.shape}, expected ({self.count}, 2)")
+        if not np.isfinite(forces).all():
+            raise ValueError("execute_batch returned non-finite forces")
+        return [Vector2D(fx, fy) for fx, fy in forces.tolist()]
+
 class BaseBehavior:
     """Base class for all behaviors"""
     def execute(self, context: BehaviorContext) -> Vector2D:
         raise NotImplementedError
 
+    def avoid_walls(self, agent: 'Agent') -> Vector2D:
+        """Steer away from nearby walls using the world's distance field"""
+        field = agent.world.distance_field if agent.world else None
+        if field is None:
+            return Vector2D(0, 0)
+
+        position = agent.position
+        clearance = field.sample(position.x, position.y) - agent.physics.radius
+        if clearance >= WALL_AVOID_DISTANCE:
+            return Vector2D(0, 0)
+
+        strength = min(1.0, 1.0 - clearance / WALL_AVOID_DISTANCE)
+        away = field.gradient(position.x, position.y).normalize()
+        return away * agent.movement.max_force * strength
+
+    def navigation(self, agent: 'Agent') -> Optional['NavGrid']:
+        """The world's navigation grid, or None (no world, e.g. in the sandbox)"""
+        return agent.world.get_navigation() if agent.world else None
+
 class WanderBehavior(BaseBehavior):
     def execute(self, context: BehaviorContext) -> Vector2D:
         agent = context.agent
@@ -136,7 +243,7 @@ class WanderBehavior(BaseBehavior):
         return Vector2D(
             math.cos(angle) * agent.movement.max_force,
             math.sin(angle) * agent.movement.max_force
-        )
+        ) + self.avoid_walls(agent)
 
 class WanderTogetherBehavior(BaseBehavior):
     def execute(self, context: BehaviorContext) -> Vector2D:
@@ -167,7 +274,7 @@ class AttackBehavior(BaseBehavior):
             target = min(combat_enemies, 
                         key=lambda e: (e.position - agent.position).magnitude())
             agent.target_id = target.id
-            return self._calculate_attack_force(agent, target)
+            return self._calculate_attack_force(agent, target) + self.avoid_walls(agent)
         
         # If no combat targets, check visual range for pursuit
         visual_enemies = context.get_enemies_in_zone(ZoneType.VISUAL)
@@ -175,7 +282,7 @@ class AttackBehavior(BaseBehavior):
             target = min(visual_enemies,
                         key=lambda e: (e.position - agent.position).magnitude())
             agent.target_id = target.id
-            return self._calculate_pursuit_force(agent, target)
+            return self._calculate_pursuit_force(agent, target) + self.avoid_walls(agent)
         
         return Vector2D(0, 0)
     
@@ -188,8 +295,15 @@ class AttackBehavior(BaseBehavior):
         return Vector2D(0, 0)
     
     def _calculate_pursuit_force(self, agent: 'Agent', target: 'Agent') -> Vector2D:
-        to_target = target.position - agent.position
-        return to_target.normalize() * agent.movement.max_force * 1.2
+        direction = (target.position - agent.position).normalize()
+        navigation = self.navigation(agent)
+        if navigation is not None and not navigation.line_of_sight(agent.position, target.position, skip_ends=True):
+            # Walls in the way: follow the target's flow field, shared by all its pursuers
+            field = navigation.flow_field(target.position)
+            steer = field.direction_to_goal(agent.position.x, agent.position.y) if field else None
+            if steer is not None:
+                direction = steer
+        return direction * agent.movement.max_force * 1.2
 
 class FleeBehavior(BaseBehavior):
     def execute(self, context: BehaviorContext) -> Vector2D:
@@ -206,7 +320,17 @@ class FleeBehavior(BaseBehavior):
         danger_center = danger_center * (1.0 / len(enemies))
         
         flee_direction = (agent.position - danger_center).normalize()
-        return flee_direction * agent.movement.max_force
+        navigation = self.navigation(agent)
+        if navigation is not None:
+            ahead = agent.position + flee_direction * NAV_FLEE_LOOKAHEAD
+            if not navigation.line_of_sight(agent.position, ahead, skip_ends=True):
+                # Cornered: move away from the nearest enemy along paths around the walls
+                nearest = min(enemies, key=lambda e: (e.position - agent.position).magnitude())
+                field = navigation.flow_field(nearest.position)
+                steer = field.direction_from_goal(agent.position.x, agent.position.y) if field else None
+                if steer is not None:
+                    flee_direction = steer
+        return flee_direction * agent.movement.max_force + self.avoid_walls(agent)
 
 class DecisionMaker:
     def __init__(self):
@@ -271,6 +395,7 @@ class BehaviorSystem:
             if new_behavior != self.current_behaviors.get(agent.id):
                 self.current_behaviors[agent.id] = new_behavior
                 self.behavior_timers[agent.id] = 0
+                profiler.incr("behavior_switches")
                 logger.info(f"Agent {agent.id} changing behavior to {new_behavior.name}")
             
             # Execute behavior with context
@@ -3,3 +3,64 @@ CANVAS_WIDTH = 400
 CANVAS_HEIGHT = 400
 FPS = 60
 UPDATE_INTERVAL = 1/FPS
+# Simulation steps per second run by the game loop
+SIMULATION_HZ = FPS
+# Snapshot publish rates (Hz) per client tier; the loop publishes at the highest
+SNAPSHOT_RATES = {"player": 20, "spectator": 10}
+DEFAULT_SNAPSHOT_TIER = "player"
+SNAPSHOT_HZ = max(SNAPSHOT_RATES.values())
+# Default behavior decision interval (config: behaviorUpdateInterval)
+DECISION_INTERVAL_MS = 100
+# Attack and death resolution rate
+COMBAT_HZ = 20
+# Recent deaths kept in memory (older ones are only in telemetry storage)
+DEAD_AGENTS_HISTORY = 500
+# Seconds between GameStats telemetry snapshots
+TELEMETRY_STATS_INTERVAL = 5.0
+# Maximum simulation substeps run in one frame to catch up after a stall
+MAX_CATCHUP_STEPS = 5
+
+# Broadphase cell size for static wall lookups
+WALL_GRID_CELL_SIZE = 64
+
+# Signed distance field sampling step (world units per cell)
+SDF_RESOLUTION = 5.0
+# Clearance below which behaviors steer away from walls
+WALL_AVOID_DISTANCE = 25.0
+
+# Navigation grid cell size (world units) and the agent radius walls are inflated by
+NAV_CELL_SIZE = 16.0
+NAV_AGENT_RADIUS = 10.0
+# Cached A* paths and flow fields per navigation grid (LRU)
+NAV_PATH_CACHE_SIZE = 256
+NAV_FLOW_CACHE_SIZE = 32
+# Flow field goals snap to blocks of this many cells so moving targets share fields longer
+NAV_FLOW_GOAL_SPAN = 3
+# New flow fields built per tick; agents over budget steer straight until the next decision
+NAV_FLOW_BUILDS_PER_TICK = 2
+# Distance ahead a fleeing agent checks for walls before it takes the flow field
+NAV_FLEE_LOOKAHEAD = 64.0
+
+# Compiled custom behaviors kept in memory (LRU)
+BEHAVIOR_CACHE_SIZE = 64
+
+# Worker processes running custom behavior code (0 runs it inline)
+SANDBOX_WORKERS = 2
+# Seconds a worker has to answer before its agents fall back to wander
+SANDBOX_DEADLINE = 0.05
+# Consecutive missed deadlines before a worker is killed and restarted
+SANDBOX_MAX_TIMEOUTS = 3
+# Worker restarts a behavior may cause before it is disabled
+SANDBOX_MAX_STRIKES = 3
+
+# Trial match run on new custom behaviors before they are accepted
+PROFILE_TEAM_SIZE = 20       # Agents per team (the behavior steers red)
+PROFILE_TICKS = 60           # Decisions per agent
+PROFILE_ALLOC_CALLS = 200    # Decisions traced for allocations
+PROFILE_TIMEOUT = 15.0       # Seconds before the trial is abandoned
+# Per-decision budgets: over the heavy ones flags, over the max rejects
+BEHAVIOR_HEAVY_MEAN_US = 100
+BEHAVIOR_HEAVY_P99_US = 1000
+BEHAVIOR_MAX_P99_US = 10000
+# Fraction of trial decisions allowed to raise
+BEHAVIOR_MAX_ERROR_RATE = 0.5
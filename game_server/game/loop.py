@@ -1,17 +1,31 @@
 # game_server/game/loop.py
 
 import asyncio
-from typing import Callable
+import time
+from typing import Any, Callable, Dict, List, Optional
 from loguru import logger
 from .state_manager import GameState
-from .constants import UPDATE_INTERVAL
+from .constants import MAX_CATCHUP_STEPS, SIMULATION_HZ, SNAPSHOT_HZ
+from .timing import TickTimingStats
+from .profiler import profiler
 
 class GameLoop:
-    def __init__(self, game_state: GameState, broadcast_callback: Callable):
+    def __init__(self, game_state: GameState, broadcast_callback: Callable,
+                 snapshot_callback: Optional[Callable] = None,
+                 simulation_hz: float = SIMULATION_HZ,
+                 snapshot_hz: float = SNAPSHOT_HZ):
         self.game_state = game_state
         self.broadcast_callback = broadcast_callback
+        # Receives game_update data at the snapshot rate; falls back to a plain broadcast
+        self.snapshot_callback = snapshot_callback
+        self.simulation_hz = simulation_hz
+        self.tick_interval = 1 / simulation_hz
+        # Snapshots go out every N simulation ticks
+        self.ticks_per_snapshot = max(1, round(simulation_hz / snapshot_hz))
+        self.last_snapshot_tick: Optional[int] = None
         self.is_running = False
         self.task = None
+        self.timing = TickTimingStats()
 
     async def start(self):
         if not self.task:
@@ -33,44 +47,107 @@ class GameLoop:
             self.task = None
             logger.info("Game loop stopped")
 
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """Tick timing summary for capacity planning"""
+        return self.timing.to_dict()
+
+    def _run_substeps(self, accumulator: float) -> tuple:
+        """
+        Run fixed-size simulation steps while the accumulator holds a full
+        timestep, up to MAX_CATCHUP_STEPS.
+        Returns (last state, kills from all substeps, steps run, accumulator)
+        """
+        state = None
+        kills: List[Dict[str, Any]] = []
+        steps = 0
+        while accumulator >= self.tick_interval and steps < MAX_CATCHUP_STEPS:
+            tick_start = time.perf_counter()
+            state = self.game_state.update(self.tick_interval, snapshot=False)
+            self.timing.record_tick(time.perf_counter() - tick_start, self.tick_interval)
+            kills.extend(state.get("recent_kills", []))
+            accumulator -= self.tick_interval
+            steps += 1
+
+        if accumulator >= self.tick_interval:
+            # Too far behind: drop the backlog instead of spiralling
+            dropped = int(accumulator // self.tick_interval)
+            self.timing.dropped_ticks += dropped
+            accumulator -= dropped * self.tick_interval
+        return state, kills, steps, accumulator
+
+    def _snapshot_due(self) -> bool:
+        tick = self.game_state.tick
+        if self.last_snapshot_tick is None or tick < self.last_snapshot_tick:
+            return True
+        return tick - self.last_snapshot_tick >= self.ticks_per_snapshot
+
+    async def _publish_snapshot(self) -> None:
+        """Serialize the agents and hand them to the network layer"""
+        update = self.game_state.get_snapshot()
+        self.last_snapshot_tick = update["tick"]
+        if self.snapshot_callback:
+            await self.snapshot_callback(update)
+        else:
+            await self.broadcast_callback({
+                "type": "game_update",
+                "data": update
+            })
+
     async def _loop(self):
         frame_count = 0
+        accumulator = 0.0
+        previous = time.perf_counter()
         while self.is_running:
             try:
+                frame_start = time.perf_counter()
+                accumulator += frame_start - previous
+                previous = frame_start
+
                 if self.game_state.is_running:
                     # The world update happens inside state.update().
-                    state = self.game_state.update()
-                    
-                    # Broadcast game update
-                    await self.broadcast_callback({
-                        "type": "game_update",
-                        "data": {
-                            "timestamp": state["timestamp"],
-                            "agents": state["agents"],
-                            "stats": state["stats"]
-                        }
-                    })
-                    
-                    # Broadcast combat event if needed
-                    if "recent_kills" in state and state["recent_kills"]:
-                        await self.broadcast_callback({
-                            "type": "combat_event",
-                            "data": {
-                                "kills": state["recent_kills"],
-                                "stats": state["stats"]
-                            }
-                        })
+                    state, kills, steps, accumulator = self._run_substeps(accumulator)
+
+                    if state is not None:
+                        # Snapshots run at their own rate, below the simulation rate
+                        if self._snapshot_due():
+                            broadcast_start = time.perf_counter()
+                            await self._publish_snapshot()
+                            profiler.record("broadcast", time.perf_counter() - broadcast_start)
+                        
+                        # Combat events go out on the frame they happen
+                        if kills:
+                            await self.broadcast_callback({
+                                "type": "combat_event",
+                                "data": {
+                                    "kills": kills,
+                                    "stats": state["stats"]
+                                }
+                            })
+
+                        self.timing.record_frame(time.perf_counter() - frame_start, steps)
+
+                        # Periodic logging
+                        frame_count += steps
+                        if frame_count >= self.simulation_hz:  # roughly once per second
+                            timing = self.timing.to_dict()
+                            logger.debug(
+                                f"Game running with {len(self.game_state.agents)} agents "
+                                f"(tick p50={timing['tick_ms']['p50']:.2f}ms "
+                                f"p99={timing['tick_ms']['p99']:.2f}ms, overruns={timing['overruns']})"
+                            )
+                            frame_count = 0
+                else:
+                    # Paused: don't build up simulation debt
+                    accumulator = 0.0
 
-                    # Periodic logging
-                    frame_count += 1
-                    if frame_count >= 60:  # roughly once per second at 60 FPS
-                        logger.debug(f"Game running with {len(self.game_state.agents)} agents")
-                        frame_count = 0
-                
-                await asyncio.sleep(UPDATE_INTERVAL)
+                # Sleep only for what is left of the current timestep
+                remaining = self.tick_interval - accumulator - (time.perf_counter() - previous)
+                await asyncio.sleep(max(0.0, remaining))
                     
             except asyncio.CancelledError:
                 raise
             except Exception as e:
                 logger.exception(f"Error in game loop: {e}")
                 await asyncio.sleep(1)  # Wait before retrying
+                accumulator = 0.0
+                previous = time.perf_counter()
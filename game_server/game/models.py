@@ -9,6 +9,7 @@ from loguru import logger
 from .behaviors import BehaviorSystem
 from .vector import Vector2D
 from .world.world import World
+from .constants import UPDATE_INTERVAL, FPS
 
 @dataclass
 class GameStats:
@@ -81,25 +82,127 @@ class MovementStats:
             y=max(min_y, min(max_y, position.y))
         )
 
-@dataclass
 class Physics:
-    position: Vector2D
-    velocity: Vector2D
-    acceleration: Vector2D
-    radius: float = 10.0
-    stored_force: Optional[Vector2D] = None
+    """
+    Kinematic state of an agent.
+    Standalone instances keep their own vectors; once bound to an
+    AgentStore slot they act as a view over the store's arrays.
+    """
+    def __init__(self,
+                 position: Vector2D,
+                 velocity: Vector2D,
+                 acceleration: Vector2D,
+                 radius: float = 10.0,
+                 stored_force: Optional[Vector2D] = None):
+        self._position = position
+        self._velocity = velocity
+        self._acceleration = acceleration
+        self._radius = radius
+        self.stored_force = stored_force
+
+        # Store binding (see AgentStore)
+        self._store = None
+        self._slot = -1
+        self._generation = -1
+
+    def bind(self, store, slot: int) -> None:
+        """Bind to an AgentStore slot; the store becomes the source of truth"""
+        self._store = store
+        self._slot = slot
+        self._generation = -1
+
+    def rebind(self, slot: int) -> None:
+        """Follow a slot move inside the bound store"""
+        self._slot = slot
+        self._generation = -1
+
+    def unbind(self) -> None:
+        """Detach from the store, keeping a copy of the current values"""
+        if self._store is None:
+            return
+        self._position = self.position
+        self._velocity = self.velocity
+        self._acceleration = self.acceleration
+        self._radius = float(self._store.radius[self._slot])
+        self._store = None
+        self._slot = -1
+
+    def _refresh(self) -> None:
+        """Rebuild cached vectors if the store stepped since the last read"""
+        store = self._store
+        if self._generation != store.generation:
+            px, py = store.position[self._slot].tolist()
+            vx, vy = store.velocity[self._slot].tolist()
+            self._position = Vector2D(px, py)
+            self._velocity = Vector2D(vx, vy)
+            self._generation = store.generation
+
+    @property
+    def position(self) -> Vector2D:
+        if self._store is not None:
+            self._refresh()
+        return self._position
+
+    @position.setter
+    def position(self, value: Vector2D):
+        if self._store is not None:
+            self._refresh()
+            self._store.position[self._slot] = (value.x, value.y)
+        self._position = value
+
+    @property
+    def velocity(self) -> Vector2D:
+        if self._store is not None:
+            self._refresh()
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value: Vector2D):
+        if self._store is not None:
+            self._refresh()
+            self._store.velocity[self._slot] = (value.x, value.y)
+        self._velocity = value
+
+    @property
+    def acceleration(self) -> Vector2D:
+        if self._store is not None:
+            ax, ay = self._store.acceleration[self._slot].tolist()
+            return Vector2D(ax, ay)
+        return self._acceleration
+
+    @acceleration.setter
+    def acceleration(self, value: Vector2D):
+        if self._store is not None:
+            self._store.acceleration[self._slot] = (value.x, value.y)
+        self._acceleration = value
+
+    @property
+    def radius(self) -> float:
+        if self._store is not None:
+            return float(self._store.radius[self._slot])
+        return self._radius
+
+    @radius.setter
+    def radius(self, value: float):
+        if self._store is not None:
+            self._store.radius[self._slot] = value
+        self._radius = value
     
-    def update(self, movement: MovementStats):
-        """Update physics state"""
-        # Apply stored force if exists
+    def update(self, movement: MovementStats, dt: float = UPDATE_INTERVAL):
+        """
+        Update physics state over dt seconds.
+        Velocities are in units per nominal tick (UPDATE_INTERVAL).
+        """
+        step = dt / UPDATE_INTERVAL
+
+        # Apply the last decided force; it stays until the next decision
         if self.stored_force:
             self.apply_force(self.stored_force)
-            self.stored_force = None
 
         # Update velocity with acceleration
-        self.velocity = (self.velocity + self.acceleration).limit(movement.max_speed)
+        self.velocity = (self.velocity + self.acceleration * step).limit(movement.max_speed)
         # Update position with velocity
-        self.position = self.position + self.velocity
+        self.position = self.position + self.velocity * step
         # Reset acceleration
         self.acceleration = Vector2D(0, 0)
     
@@ -155,41 +258,23 @@ class Agent:
     def velocity(self, value: Vector2D):
         self.physics.velocity = value
 
-    def update_behavior(self, nearby_agents: List['Agent']) -> None:
-        """Update only behavior decisions"""
+    def update_behavior(self, nearby_agents: List['Agent'],
+                        behavior_force: Optional[Vector2D] = None) -> None:
+        """Update only behavior decisions; behavior_force overrides the behavior system"""
         try:
-            behavior_force = self.behavior_system.update(self, nearby_agents)
+            if behavior_force is None:
+                behavior_force = self.behavior_system.update(self, nearby_agents)
             self.physics.stored_force = behavior_force
-            
-            if self.target_id:
-                target = next((a for a in nearby_agents if a.id == self.target_id), None)
-                if target and self.combat.can_attack():
-                    distance = (target.position - self.position).magnitude()
-                    if distance <= self.combat.attack_range:
-                        self.attack(target)
-                        
         except Exception as e:
             logger.error(f"Error updating agent behavior {self.id}: {e}")
 
-    def update_position(self) -> None:
+    def update_position(self, dt: float = UPDATE_INTERVAL) -> None:
         """Update position based on physics"""
         try:
-            self.physics.update(self.movement)
+            self.physics.update(self.movement, dt)
         except Exception as e:
             logger.error(f"Error updating agent position {self.id}: {e}")
 
-    def handle_combat(self, all_agents: List['Agent']) -> None:
-        """Handle combat interactions"""
-        try:
-            if self.target_id:
-                target = next((a for a in all_agents if a.id == self.target_id), None)
-                if target and self.combat.can_attack():
-                    distance = (target.position - self.position).magnitude()
-                    if distance <= self.combat.attack_range:
-                        self.attack(target)
-        except Exception as e:
-            logger.error(f"Error in combat handling for agent {self.id}: {e}")
-
     def attack(self, target: 'Agent') -> bool:
         """Perform attack on target"""
         try:
@@ -218,6 +303,11 @@ class Agent:
                     "x": self.physics.position.x,
                     "y": self.physics.position.y
                 },
+                # Units per second, for client-side extrapolation
+                "velocity": {
+                    "x": self.physics.velocity.x * FPS,
+                    "y": self.physics.velocity.y * FPS
+                },
                 "health": self.combat.health,
                 "target_id": self.target_id,
                 "behavior": self.current_behavior
@@ -0,0 +1,132 @@
+# game_server/game/physics/agent_store.py
+
+from typing import Dict, List, Tuple
+import numpy as np
+from ..constants import UPDATE_INTERVAL
+
+# Forward reference for type hints
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..models import Agent, Physics
+
+class AgentStore:
+    """
+    Structure-of-arrays storage for agent kinematics.
+    Rows are contiguous slots [0, count); removal swaps the last row into
+    the freed slot. Agents keep a Physics object bound to their slot, which
+    reads and writes through to these arrays.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = max(1, capacity)
+        self.count = 0
+        # Bumped after every batched step so bound Physics views refresh
+        self.generation = 0
+
+        self.position = np.zeros((self.capacity, 2), dtype=np.float64)
+        self.velocity = np.zeros((self.capacity, 2), dtype=np.float64)
+        self.acceleration = np.zeros((self.capacity, 2), dtype=np.float64)
+        self.max_speed = np.zeros(self.capacity, dtype=np.float64)
+        self.radius = np.zeros(self.capacity, dtype=np.float64)
+
+        self.ids: List[str] = []
+        self.physics: List['Physics'] = []
+        self.slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self.slots
+
+    def _grow(self) -> None:
+        new_capacity = self.capacity * 2
+        for name in ("position", "velocity", "acceleration", "max_speed", "radius"):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = new_capacity
+
+    def add(self, agent: 'Agent') -> int:
+        """Copy an agent's kinematics into a new slot and bind its Physics to it"""
+        if agent.id in self.slots:
+            return self.slots[agent.id]
+        if self.count == self.capacity:
+            self._grow()
+
+        slot = self.count
+        physics = agent.physics
+        self.position[slot] = (physics.position.x, physics.position.y)
+        self.velocity[slot] = (physics.velocity.x, physics.velocity.y)
+        self.acceleration[slot] = (physics.acceleration.x, physics.acceleration.y)
+        self.max_speed[slot] = agent.movement.max_speed
+        self.radius[slot] = physics.radius
+
+        self.ids.append(agent.id)
+        self.physics.append(physics)
+        self.slots[agent.id] = slot
+        self.count += 1
+        physics.bind(self, slot)
+        return slot
+
+    def remove(self, agent_id: str) -> None:
+        """Release an agent's slot; its Physics keeps a detached copy of the values"""
+        slot = self.slots.pop(agent_id, None)
+        if slot is None:
+            return
+
+        self.physics[slot].unbind()
+        last = self.count - 1
+        if slot != last:
+            for array in (self.position, self.velocity, self.acceleration, self.max_speed, self.radius):
+                array[slot] = array[last]
+            moved = self.physics[last]
+            self.ids[slot] = self.ids[last]
+            self.physics[slot] = moved
+            self.slots[self.ids[slot]] = slot
+            moved.rebind(slot)
+
+        self.ids.pop()
+        self.physics.pop()
+        self.count -= 1
+
+    def gather_forces(self) -> None:
+        """Add each agent's stored behavior force to the acceleration array"""
+        n = self.count
+        if n == 0:
+            return
+        forces = [
+            (force.x, force.y) if force is not None else (0.0, 0.0)
+            for force in (physics.stored_force for physics in self.physics)
+        ]
+        self.acceleration[:n] += np.asarray(forces, dtype=np.float64)
+
+    def integrate(self, dt: float = UPDATE_INTERVAL) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batched equivalent of Physics.update for every slot.
+        Returns copies of the pre-step positions and velocities so the
+        caller can resolve collisions from the last valid state.
+        """
+        n = self.count
+        step = dt / UPDATE_INTERVAL
+        position = self.position[:n]
+        velocity = self.velocity[:n]
+        previous_position = position.copy()
+        previous_velocity = velocity.copy()
+
+        velocity += self.acceleration[:n] * step
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        max_speed = self.max_speed[:n]
+        too_fast = speed > max_speed
+        if too_fast.any():
+            velocity[too_fast] *= (max_speed[too_fast] / speed[too_fast])[:, None]
+
+        position += velocity * step
+        self.acceleration[:n] = 0.0
+        self.generation += 1
+        return previous_position, previous_velocity
+
+    def mark_dirty(self) -> None:
+        """Invalidate cached Physics views after writing to the arrays directly"""
+        self.generation += 1
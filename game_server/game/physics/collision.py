@@ -2,8 +2,10 @@
 
 from typing import Tuple, Optional
 import math
+import numpy as np
 from ..vector import Vector2D
 from ..world.wall import Wall
+from ..profiler import profiler
 
 class CollisionInfo:
     """Stores information about a collision"""
@@ -85,4 +87,80 @@ def resolve_collision(
     tangent_dot = velocity.dot(tangent)
     new_velocity = new_velocity + (tangent * tangent_dot * friction)
     
-    return new_position, new_velocity
\ No newline at end of file
+    return new_position, new_velocity
+
+def batch_circle_box_collision(
+    positions: np.ndarray,
+    radii: np.ndarray,
+    circles: np.ndarray,
+    boxes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized circle_wall_collision over candidate pairs from the wall
+    broadphase: circle circles[k] against wall box boxes[k] (left, top,
+    right, bottom). Keeps the closest colliding wall per circle (the first
+    listed on ties), like World.check_collisions.
+    Returns (colliding mask, normals (N, 2), penetrations (N,))
+    """
+    n = len(positions)
+    colliding = np.zeros(n, dtype=bool)
+    normals = np.zeros((n, 2), dtype=np.float64)
+    penetrations = np.zeros(n, dtype=np.float64)
+    profiler.incr("wall_narrowphase_tests", int(circles.size))
+    if circles.size == 0:
+        return colliding, normals, penetrations
+
+    px = positions[circles, 0]
+    py = positions[circles, 1]
+    dx = px - np.clip(px, boxes[:, 0], boxes[:, 2])
+    dy = py - np.clip(py, boxes[:, 1], boxes[:, 3])
+    distance = np.hypot(dx, dy)
+    hit = distance <= radii[circles]
+    if not hit.any():
+        return colliding, normals, penetrations
+
+    # Closest wall per circle; the stable sort keeps the first of equals
+    circles, dx, dy, distance = circles[hit], dx[hit], dy[hit], distance[hit]
+    order = np.lexsort((distance, circles))
+    circles, dx, dy, distance = circles[order], dx[order], dy[order], distance[order]
+    first = np.ones(circles.size, dtype=bool)
+    first[1:] = circles[1:] != circles[:-1]
+    idx, dx, dy, distance = circles[first], dx[first], dy[first], distance[first]
+    colliding[idx] = True
+
+    # Circle center is inside wall, push out in x direction
+    inside = distance < 0.0001
+    inside_idx = idx[inside]
+    normals[inside_idx] = (1.0, 0.0)
+    penetrations[inside_idx] = radii[inside_idx]
+
+    outside = ~inside
+    outside_idx = idx[outside]
+    normals[outside_idx, 0] = dx[outside] / distance[outside]
+    normals[outside_idx, 1] = dy[outside] / distance[outside]
+    penetrations[outside_idx] = radii[outside_idx] - distance[outside]
+    return colliding, normals, penetrations
+
+def batch_resolve_collision(
+    positions: np.ndarray,
+    velocities: np.ndarray,
+    normals: np.ndarray,
+    penetrations: np.ndarray,
+    restitution: float = 0.3  # Bounce factor
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized resolve_collision for rows that are known to collide
+    Returns new positions and velocities
+    """
+    new_positions = positions + normals * penetrations[:, None]
+
+    dot_product = np.einsum("ij,ij->i", velocities, normals)
+    new_velocities = velocities - normals * ((1 + restitution) * dot_product)[:, None]
+
+    # Apply friction
+    friction = 0.8
+    tangents = np.stack((-normals[:, 1], normals[:, 0]), axis=1)
+    tangent_dot = np.einsum("ij,ij->i", velocities, tangents)
+    new_velocities += tangents * (tangent_dot * friction)[:, None]
+
+    return new_positions, new_velocities
@@ -0,0 +1,114 @@
+# game_server/game/physics/spatial_grid.py
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..vector import Vector2D
+
+# Forward reference for type hints
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..models import Agent
+
+Cell = Tuple[int, int]
+
+class SpatialGrid:
+    """
+    Uniform spatial hash of agents by position.
+    Cells are sized to the largest awareness range so a zone query only
+    has to visit the 3x3 block of cells around the querying agent.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError(f"Invalid cell size: {cell_size}")
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Dict[str, 'Agent']] = {}
+        self.agent_cells: Dict[str, Cell] = {}
+
+    def _cell_of(self, x: float, y: float) -> Cell:
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def clear(self) -> None:
+        """Remove all agents from the grid"""
+        self.cells.clear()
+        self.agent_cells.clear()
+
+    def insert(self, agent: 'Agent') -> None:
+        """Insert (or move) an agent into the cell matching its position"""
+        cell = self._cell_of(agent.position.x, agent.position.y)
+        previous = self.agent_cells.get(agent.id)
+        if previous == cell:
+            self.cells[cell][agent.id] = agent
+            return
+        if previous is not None:
+            self._discard(agent.id, previous)
+        self.cells.setdefault(cell, {})[agent.id] = agent
+        self.agent_cells[agent.id] = cell
+
+    def remove(self, agent_id: str) -> None:
+        """Remove an agent from the grid"""
+        cell = self.agent_cells.pop(agent_id, None)
+        if cell is not None:
+            self._discard(agent_id, cell)
+
+    def _discard(self, agent_id: str, cell: Cell) -> None:
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(agent_id, None)
+            if not bucket:
+                del self.cells[cell]
+
+    def sync(self, agents: Iterable['Agent']) -> None:
+        """
+        Incrementally bring the grid in line with the given agents.
+        Only agents that crossed a cell boundary are moved; agents that
+        are no longer present are dropped.
+        """
+        seen = set()
+        for agent in agents:
+            seen.add(agent.id)
+            self.insert(agent)
+
+        for agent_id in [a for a in self.agent_cells if a not in seen]:
+            self.remove(agent_id)
+
+    def rebuild(self, agents: Iterable['Agent']) -> None:
+        """Rebuild the grid from scratch"""
+        self.clear()
+        for agent in agents:
+            self.insert(agent)
+
+    def get_candidates(self, position: Vector2D, radius: float) -> List['Agent']:
+        """
+        Get all agents in cells overlapping the circle's bounding box.
+        Results are not distance filtered; for radius == cell_size this
+        is exactly the 3x3 neighbourhood.
+        """
+        min_cx, min_cy = self._cell_of(position.x - radius, position.y - radius)
+        max_cx, max_cy = self._cell_of(position.x + radius, position.y + radius)
+
+        result: List['Agent'] = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    result.extend(bucket.values())
+        return result
+
+    def query_radius(self, position: Vector2D, radius: float,
+                     exclude_id: Optional[str] = None) -> List['Agent']:
+        """Get agents whose position lies within radius of the given point"""
+        radius_sq = radius * radius
+        px, py = position.x, position.y
+        result: List['Agent'] = []
+        for other in self.get_candidates(position, radius):
+            if other.id == exclude_id:
+                continue
+            dx = other.position.x - px
+            dy = other.position.y - py
+            if dx * dx + dy * dy <= radius_sq:
+                result.append(other)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.agent_cells)
@@ -0,0 +1,121 @@
+# game_server/game/profiler.py
+
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from .timing import RollingWindow
+
+# Bucket upper bounds in seconds (16.7ms is one frame at 60 FPS)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.0167, 0.025, 0.05, 0.1)
+
+class RollingHistogram(RollingWindow):
+    """Rolling window of durations that can also be read back as bucket counts"""
+
+    def __init__(self, size: int = 600, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(size)
+        self.buckets = tuple(buckets)
+        self.total = 0.0  # Sum of all samples ever recorded
+
+    def record(self, value: float) -> None:
+        super().record(value)
+        self.total += value
+
+    def bucket_counts(self) -> Dict[str, int]:
+        """Per-bucket counts over the current window; last bucket is +Inf"""
+        counts = [0] * (len(self.buckets) + 1)
+        for value in self.samples:
+            counts[bisect_left(self.buckets, value)] += 1
+        labels = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        return dict(zip(labels, counts))
+
+class TickProfiler:
+    """
+    Low-overhead instrumentation for the tick pipeline.
+    Phases are timed into rolling histograms; hot paths bump named
+    counters once per call (not per inner iteration).
+    """
+
+    def __init__(self, window: int = 600):
+        self.window = window
+        self.enabled = True
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def _histogram(self, name: str) -> RollingHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window)
+        return histogram
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block into the named histogram"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._histogram(name).record(time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a duration measured elsewhere"""
+        if self.enabled:
+            self._histogram(name).record(seconds)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increase a counter"""
+        if self.enabled:
+            self.counters[name] += amount
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+
+    def snapshot(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """JSON-friendly view of all histograms (ms) and counters"""
+        histograms = {}
+        for name, histogram in self.histograms.items():
+            histograms[name] = {
+                **{k: v * 1000 for k, v in histogram.percentiles((50, 90, 99)).items()},
+                "mean": histogram.mean() * 1000,
+                "max": histogram.max() * 1000,
+                "count": histogram.count,
+                "buckets": histogram.bucket_counts()
+            }
+        snapshot = {
+            "timestamp": int(time.time() * 1000),
+            "histograms_ms": histograms,
+            "counters": dict(self.counters)
+        }
+        if extra:
+            snapshot.update(extra)
+        return snapshot
+
+    def render_text(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus-style text exposition"""
+        lines: List[str] = []
+        if self.histograms:
+            lines.append("# TYPE game_duration_seconds summary")
+        for name, histogram in sorted(self.histograms.items()):
+            for key, value in histogram.percentiles((50, 90, 99)).items():
+                quantile = int(key[1:]) / 100
+                lines.append(f'game_duration_seconds{{name="{name}",quantile="{quantile:g}"}} {value:.9f}')
+            lines.append(f'game_duration_seconds_sum{{name="{name}"}} {histogram.total:.9f}')
+            lines.append(f'game_duration_seconds_count{{name="{name}"}} {histogram.count}')
+
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE game_{name}_total counter")
+            lines.append(f"game_{name}_total {value}")
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE game_{name} gauge")
+            lines.append(f"game_{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+# Process-wide profiler shared by the simulation and network layers
+profiler = TickProfiler()
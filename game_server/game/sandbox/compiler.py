@@ -0,0 +1,30 @@
+# game_server/game/sandbox/compiler.py
+
+import math
+import random
+from typing import Any
+import numpy as np
+from loguru import logger
+from ..vector import Vector2D
+
+def compile_behavior(behavior_id: str, behavior_code: str) -> Any:
+    """Compile custom behavior code and instantiate its CustomBehavior class."""
+    # Imported here so sandbox workers don't need the full model module up front
+    from ..models import Agent
+
+    # One namespace for globals and locals so methods can see these names
+    namespace = {
+        "__name__": f"custom_behavior_{behavior_id}",
+        "Vector2D": Vector2D,
+        "math": math,
+        "random": random,
+        "np": np,
+        "Agent": Agent,
+        "logger": logger,
+    }
+    code = compile(behavior_code, f"<behavior {behavior_id}>", "exec")
+    exec(code, namespace)
+    behavior_class = namespace.get("CustomBehavior")
+    if not behavior_class:
+        raise ValueError("Custom behavior does not define 'CustomBehavior' class.")
+    return behavior_class()
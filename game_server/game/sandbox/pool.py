@@ -0,0 +1,266 @@
+# game_server/game/sandbox/pool.py
+
+import multiprocessing
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from loguru import logger
+from ..vector import Vector2D
+from ..profiler import profiler
+from ..constants import SANDBOX_WORKERS, SANDBOX_DEADLINE, SANDBOX_MAX_TIMEOUTS, SANDBOX_MAX_STRIKES
+from .worker import READY, AgentRow, Task, pack_agent, run_worker
+
+@dataclass
+class _Request:
+    request_id: int
+    sent_at: float
+    agent_ids: List[str]
+    behavior_ids: List[str]   # In the order the worker runs them
+    deadlines_missed: int = 0
+
+@dataclass
+class _Worker:
+    index: int
+    process: Any = None
+    conn: Any = None
+    progress: Any = None                               # Behavior group being run
+    ready: bool = False                                # Finished starting up
+    loaded: Set[str] = field(default_factory=set)     # Source hashes the worker has
+    pending: Optional[_Request] = None                 # At most one request in flight
+    timeouts: int = 0                                  # Consecutive missed deadlines
+    tasks: List[Task] = field(default_factory=list)   # Queued for the next dispatch
+    sources: Dict[str, tuple] = field(default_factory=dict)
+
+class BehaviorSandbox:
+    """
+    Runs custom behavior code in worker processes.
+    Each tick the simulation queues agents, collects whatever results have
+    arrived and dispatches new requests without ever waiting on a worker.
+    Forces arrive one or more ticks late; agents whose worker misses the
+    deadline have no force and fall back to wander. Workers that keep
+    missing it are killed and restarted, and the behavior that was running
+    gets a strike; behaviors with too many strikes are disabled until their
+    code changes.
+    """
+
+    def __init__(self, workers: int = SANDBOX_WORKERS,
+                 deadline: float = SANDBOX_DEADLINE,
+                 max_timeouts: int = SANDBOX_MAX_TIMEOUTS,
+                 max_strikes: int = SANDBOX_MAX_STRIKES):
+        self.deadline = deadline
+        self.max_timeouts = max_timeouts
+        self.max_strikes = max_strikes
+        # Spawn, not fork: the simulation process runs threads (e.g. SDF builds)
+        self._ctx = multiprocessing.get_context("spawn")
+        self.workers = [_Worker(index) for index in range(max(1, workers))]
+        self.started = False
+        self.forces: Dict[str, Vector2D] = {}
+        self.strikes: Dict[str, int] = {}
+        self.disabled: Set[str] = set()
+        self._rows: Dict[str, AgentRow] = {}
+        self._next_request = 0
+
+    def start(self) -> None:
+        if not self.started:
+            for worker in self.workers:
+                self._start_worker(worker)
+            self.started = True
+
+    def shutdown(self) -> None:
+        """Stop all workers"""
+        for worker in self.workers:
+            self._stop_worker(worker)
+        self.started = False
+
+    def _start_worker(self, worker: _Worker) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        worker.progress = self._ctx.Value("i", 0, lock=False)
+        worker.process = self._ctx.Process(
+            target=run_worker,
+            args=(child_conn, worker.progress),
+            name=f"behavior-sandbox-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.ready = False
+        worker.loaded.clear()
+        worker.pending = None
+        worker.timeouts = 0
+
+    def _stop_worker(self, worker: _Worker, kill: bool = False) -> None:
+        if worker.process is None:
+            return
+        try:
+            if not kill:
+                worker.conn.send(None)
+                worker.process.join(timeout=0.5)
+        except Exception:
+            pass
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=0.5)
+        worker.conn.close()
+        worker.process = None
+        worker.conn = None
+
+    def _restart_worker(self, worker: _Worker, reason: str) -> None:
+        logger.warning(f"Restarting behavior sandbox worker {worker.index}: {reason}")
+        profiler.incr("sandbox_restarts")
+        request = worker.pending
+        if request is not None:
+            # Blame the behavior the worker was stuck in, not its neighbours
+            group = worker.progress.value
+            if 0 <= group < len(request.behavior_ids):
+                behavior_id = request.behavior_ids[group]
+                self.strikes[behavior_id] = self.strikes.get(behavior_id, 0) + 1
+                if self.strikes[behavior_id] >= self.max_strikes and behavior_id not in self.disabled:
+                    self.disabled.add(behavior_id)
+                    logger.warning(f"Custom behavior {behavior_id} disabled after repeated worker restarts")
+            for agent_id in request.agent_ids:
+                self.forces.pop(agent_id, None)
+        self._stop_worker(worker, kill=True)
+        self._start_worker(worker)
+
+    def forget_behavior(self, behavior_id: str) -> None:
+        """New code for a behavior clears its record"""
+        self.strikes.pop(behavior_id, None)
+        self.disabled.discard(behavior_id)
+
+    def forget_agent(self, agent_id: str) -> None:
+        self.forces.pop(agent_id, None)
+
+    def queue(self, agent: Any, behavior_id: str, source_hash: str, code: str,
+              agents_by_zone: Dict[Any, List[Any]], time_in_behavior: float = 0) -> Optional[Vector2D]:
+        """
+        Queue an agent for the next dispatch.
+        Returns the latest force computed for it, or None if there is none
+        (not computed yet, timed out, failed or disabled).
+        """
+        if behavior_id in self.disabled:
+            return None
+
+        worker = self.workers[zlib.crc32(behavior_id.encode("utf-8")) % len(self.workers)]
+        zones: Dict[str, List[str]] = {}
+        for zone_type, others in agents_by_zone.items():
+            ids = []
+            for other in others:
+                if other.id not in self._rows:
+                    self._rows[other.id] = pack_agent(other)
+                ids.append(other.id)
+            zones[zone_type.value] = ids
+        if agent.id not in self._rows:
+            self._rows[agent.id] = pack_agent(agent)
+
+        worker.tasks.append((agent.id, behavior_id, source_hash, zones, time_in_behavior))
+        if source_hash not in worker.loaded:
+            worker.sources[source_hash] = (behavior_id, code)
+        return self.forces.get(agent.id)
+
+    def collect(self) -> None:
+        """Apply results that have arrived and enforce the deadline (non-blocking)"""
+        if not self.started:
+            return
+        now = time.perf_counter()
+        for worker in self.workers:
+            request = worker.pending
+            if request is None and worker.ready:
+                continue
+            try:
+                ready = worker.conn.poll()
+            except (EOFError, OSError):
+                self._restart_worker(worker, "connection lost")
+                continue
+
+            if not worker.ready:
+                # Startup (imports) does not count against the deadline
+                if ready:
+                    try:
+                        worker.ready = worker.conn.recv() == READY
+                    except (EOFError, OSError):
+                        self._restart_worker(worker, "connection lost")
+                elif not worker.process.is_alive():
+                    self._restart_worker(worker, "process exited during startup")
+                continue
+
+            if ready:
+                try:
+                    request_id, forces, errors = worker.conn.recv()
+                except (EOFError, OSError):
+                    self._restart_worker(worker, "connection lost")
+                    continue
+                self._apply(worker, forces, errors)
+                if not request.deadlines_missed:
+                    worker.timeouts = 0
+                worker.pending = None
+                continue
+
+            # A request stuck for several deadlines counts once per deadline
+            missed = int((now - request.sent_at) / self.deadline)
+            if missed > request.deadlines_missed:
+                if not request.deadlines_missed:
+                    # Stale forces would keep steering these agents; wander instead
+                    for agent_id in request.agent_ids:
+                        self.forces.pop(agent_id, None)
+                profiler.incr("sandbox_timeouts", missed - request.deadlines_missed)
+                worker.timeouts += missed - request.deadlines_missed
+                request.deadlines_missed = missed
+                if worker.timeouts >= self.max_timeouts:
+                    self._restart_worker(worker, f"missed {worker.timeouts} deadlines")
+            elif not worker.process.is_alive():
+                self._restart_worker(worker, "process exited")
+
+    def _apply(self, worker: _Worker, forces: Dict[str, tuple], errors: Dict[str, str]) -> None:
+        for agent_id, (fx, fy) in forces.items():
+            self.forces[agent_id] = Vector2D(fx, fy)
+        if errors:
+            profiler.incr("sandbox_errors", len(errors))
+        for agent_id, error in errors.items():
+            self.forces.pop(agent_id, None)
+            if error.startswith("missing:"):
+                # Evicted from the worker's cache; resend the source next time
+                worker.loaded.discard(error[len("missing:"):])
+            else:
+                logger.debug(f"Custom behavior failed for agent {agent_id}: {error}")
+
+    def dispatch(self) -> None:
+        """Send queued agents to idle workers; busy workers skip this tick"""
+        if any(worker.tasks for worker in self.workers):
+            self.start()
+
+        for worker in self.workers:
+            tasks, worker.tasks = worker.tasks, []
+            sources, worker.sources = worker.sources, {}
+            if not tasks:
+                continue
+            tasks.sort(key=lambda task: task[1])
+            if worker.pending is not None or not worker.ready:
+                profiler.incr("sandbox_skipped", len(tasks))
+                continue
+
+            agents: Dict[str, AgentRow] = {}
+            for agent_id, _, _, zones, _ in tasks:
+                agents[agent_id] = self._rows[agent_id]
+                for ids in zones.values():
+                    for other in ids:
+                        agents[other] = self._rows[other]
+
+            self._next_request += 1
+            request = _Request(
+                request_id=self._next_request,
+                sent_at=time.perf_counter(),
+                agent_ids=[task[0] for task in tasks],
+                behavior_ids=list(dict.fromkeys(task[1] for task in tasks))
+            )
+            try:
+                worker.progress.value = 0
+                worker.conn.send((request.request_id, sources, agents, tasks))
+            except (OSError, ValueError) as e:
+                self._restart_worker(worker, f"send failed: {e}")
+                continue
+            worker.loaded.update(sources)
+            worker.pending = request
+
+        self._rows.clear()
@@ -0,0 +1,216 @@
+# game_server/game/sandbox/profiling.py
+
+import math
+import multiprocessing
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+from loguru import logger
+from ..behaviors import AwarenessSystem, BehaviorBatch, BehaviorContext
+from ..constants import (
+    PROFILE_TEAM_SIZE, PROFILE_TICKS, PROFILE_ALLOC_CALLS, PROFILE_TIMEOUT,
+    BEHAVIOR_HEAVY_MEAN_US, BEHAVIOR_HEAVY_P99_US, BEHAVIOR_MAX_P99_US, BEHAVIOR_MAX_ERROR_RATE
+)
+from .compiler import compile_behavior
+from .worker import AgentRow, SandboxAgent
+
+# Side length of the square arena the trial agents start in
+_ARENA_SIZE = 300.0
+
+def scenario_rows(team_size: int = PROFILE_TEAM_SIZE, seed: int = 0) -> List[AgentRow]:
+    """
+    The standard trial scenario: two teams facing each other in a small
+    arena, placed from a fixed seed so every behavior sees the same match.
+    The behavior under test steers the red team.
+    """
+    rng = random.Random(seed)
+    rows: List[AgentRow] = []
+    for team, x_min in (("red", 0.0), ("blue", _ARENA_SIZE * 0.5)):
+        for i in range(team_size):
+            angle = rng.uniform(0, 2 * math.pi)
+            rows.append((
+                f"{team}-{i}", team,
+                x_min + rng.uniform(0, _ARENA_SIZE * 0.5), rng.uniform(0, _ARENA_SIZE),
+                math.cos(angle), math.sin(angle),
+                100.0, 100.0, 30.0, 10.0, 3.0, 0.5,
+                angle, None, None
+            ))
+    return rows
+
+def _step(views: List[SandboxAgent], forces: Dict[str, Tuple[float, float]]) -> None:
+    """Move the trial agents: red by the behavior's forces, blue toward red"""
+    red = [agent for agent in views if agent.team == "red"]
+    cx = sum(agent.position.x for agent in red) / max(1, len(red))
+    cy = sum(agent.position.y for agent in red) / max(1, len(red))
+    for agent in views:
+        if agent.team == "red":
+            fx, fy = forces.get(agent.id, (0.0, 0.0))
+        else:
+            dx, dy = cx - agent.position.x, cy - agent.position.y
+            distance = math.hypot(dx, dy) or 1.0
+            fx, fy = dx / distance * 0.5, dy / distance * 0.5
+        if not (math.isfinite(fx) and math.isfinite(fy)):
+            fx = fy = 0.0
+        vx, vy = agent.velocity.x + fx, agent.velocity.y + fy
+        speed = math.hypot(vx, vy)
+        if speed > agent.movement.max_speed:
+            vx, vy = vx / speed * agent.movement.max_speed, vy / speed * agent.movement.max_speed
+        agent.velocity.x, agent.velocity.y = vx, vy
+        agent.position.x = min(max(agent.position.x + vx, 0.0), _ARENA_SIZE)
+        agent.position.y = min(max(agent.position.y + vy, 0.0), _ARENA_SIZE)
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_trial(behavior_id: str, code: str, ticks: int = PROFILE_TICKS,
+              team_size: int = PROFILE_TEAM_SIZE) -> Dict[str, Any]:
+    """
+    Run a behavior through the standard scenario and measure it.
+    Times are per agent decision, so batch behaviors report one call's time
+    divided by the agents it steered. Allocations are measured in a separate,
+    shorter pass because tracing slows every call down.
+    """
+    profile: Dict[str, Any] = {"calls": 0, "exceptions": 0, "error": None}
+    try:
+        behavior = compile_behavior(behavior_id, code)
+    except Exception as e:
+        profile["error"] = f"{type(e).__name__}: {e}"
+        return profile
+
+    views = [SandboxAgent(row) for row in scenario_rows(team_size)]
+    subjects = [agent for agent in views if agent.team == "red"]
+    awareness = AwarenessSystem()
+    batch_mode = hasattr(behavior, "execute_batch")
+    profile["mode"] = "batch" if batch_mode else "execute"
+
+    def decide(tick: int, forces: Dict[str, Tuple[float, float]], timings: List[float]) -> None:
+        if batch_mode:
+            neighbors = [
+                [other for zone in awareness.get_agents_by_zone(agent, views).values() for other in zone]
+                for agent in subjects
+            ]
+            batch = BehaviorBatch(subjects, neighbors)
+            start = time.perf_counter()
+            try:
+                result = behavior.execute_batch(batch)
+                elapsed = time.perf_counter() - start
+                for agent_id, force in zip(batch.ids, batch.to_forces(result)):
+                    forces[agent_id] = (float(force.x), float(force.y))
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                profile["exceptions"] += len(subjects)
+                profile["error"] = profile["error"] or f"{type(e).__name__}: {e}"
+            timings.extend([elapsed / len(subjects)] * len(subjects))
+            return
+
+        for agent in subjects:
+            context = BehaviorContext(
+                agent=agent,
+                agents_by_zone=awareness.get_agents_by_zone(agent, views),
+                current_behavior=behavior_id,
+                time_in_behavior=tick
+            )
+            start = time.perf_counter()
+            try:
+                force = behavior.execute(context)
+                elapsed = time.perf_counter() - start
+                forces[agent.id] = (float(force.x), float(force.y))
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                profile["exceptions"] += 1
+                profile["error"] = profile["error"] or f"{type(e).__name__}: {e}"
+            timings.append(elapsed)
+
+    timings: List[float] = []
+    for tick in range(ticks):
+        forces: Dict[str, Tuple[float, float]] = {}
+        decide(tick, forces, timings)
+        _step(views, forces)
+
+    profile["calls"] = len(timings)
+    profile["mean_us"] = round(sum(timings) / len(timings) * 1e6, 2)
+    profile["p99_us"] = round(_percentile(timings, 0.99) * 1e6, 2)
+    profile["max_us"] = round(max(timings) * 1e6, 2)
+
+    # Allocation pass: peak memory above the starting point while one tick's
+    # decisions run (every subject), and memory blocks still alive afterwards.
+    # Errors here were already counted in the timed pass.
+    alloc_ticks = max(1, PROFILE_ALLOC_CALLS // max(1, len(subjects)))
+    exceptions, error = profile["exceptions"], profile["error"]
+    tick_peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for tick in range(alloc_ticks):
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            decide(ticks + tick, {}, [])
+            tick_peaks.append(tracemalloc.get_traced_memory()[1] - start_bytes)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    profile["exceptions"], profile["error"] = exceptions, error
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    retained = sum(
+        stat.count_diff
+        for stat in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    )
+    profile["alloc_ticks"] = alloc_ticks
+    profile["alloc_peak_bytes_per_tick"] = max(0, max(tick_peaks))
+    profile["retained_blocks"] = max(0, retained)
+    return profile
+
+def classify(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Set status ("ok", "heavy" or "rejected") and reason from the budgets"""
+    calls = profile.get("calls", 0)
+    if not calls:
+        profile["status"], profile["reason"] = "rejected", profile.get("error") or "no decisions made"
+    elif profile["exceptions"] / calls > BEHAVIOR_MAX_ERROR_RATE:
+        profile["status"], profile["reason"] = "rejected", f"raised in {profile['exceptions']} of {calls} calls: {profile['error']}"
+    elif profile["p99_us"] > BEHAVIOR_MAX_P99_US:
+        profile["status"], profile["reason"] = "rejected", f"p99 {profile['p99_us']:.0f}us over the {BEHAVIOR_MAX_P99_US}us limit"
+    elif profile["mean_us"] > BEHAVIOR_HEAVY_MEAN_US or profile["p99_us"] > BEHAVIOR_HEAVY_P99_US:
+        profile["status"], profile["reason"] = "heavy", f"mean {profile['mean_us']:.0f}us, p99 {profile['p99_us']:.0f}us per decision"
+    else:
+        profile["status"], profile["reason"] = "ok", None
+    return profile
+
+def _trial_main(conn: Any, behavior_id: str, code: str) -> None:
+    try:
+        conn.send(run_trial(behavior_id, code))
+    except Exception as e:
+        conn.send({"calls": 0, "exceptions": 0, "error": f"{type(e).__name__}: {e}"})
+
+def profile_behavior(behavior_id: str, code: str, timeout: float = PROFILE_TIMEOUT) -> Dict[str, Any]:
+    """
+    Profile a behavior in a throwaway process (the code is untrusted and may
+    never return). Blocks for up to timeout seconds; run it off the event loop.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_trial_main,
+        args=(child_conn, behavior_id, code),
+        name=f"behavior-profile-{behavior_id}",
+        daemon=True
+    )
+    process.start()
+    child_conn.close()
+    try:
+        if parent_conn.poll(timeout):
+            profile = parent_conn.recv()
+        else:
+            profile = {"calls": 0, "exceptions": 0, "error": f"trial did not finish within {timeout:.0f}s"}
+    except (EOFError, OSError):
+        profile = {"calls": 0, "exceptions": 0, "error": "trial process exited"}
+    finally:
+        parent_conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join(timeout=1.0)
+
+    classify(profile)
+    logger.info(f"Profiled behavior {behavior_id}: {profile['status']} ({profile.get('mean_us')}us mean)")
+    return profile
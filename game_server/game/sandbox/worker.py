@@ -0,0 +1,161 @@
+# game_server/game/sandbox/worker.py
+
+from collections import OrderedDict
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+from ..vector import Vector2D
+from ..behaviors import BehaviorBatch, BehaviorContext, ZoneType
+from ..constants import BEHAVIOR_CACHE_SIZE
+from .compiler import compile_behavior
+
+# Compact per-agent row shipped to workers; field order is the protocol
+AgentRow = Tuple[str, str, float, float, float, float, float, float, float, float,
+                 float, float, float, Optional[str], Optional[str]]
+
+def pack_agent(agent: Any) -> AgentRow:
+    """Snapshot the fields of a live Agent that behaviors may read"""
+    position = agent.physics.position
+    velocity = agent.physics.velocity
+    return (
+        agent.id, agent.team,
+        position.x, position.y, velocity.x, velocity.y,
+        agent.combat.health, agent.combat.max_health,
+        agent.combat.attack_range, agent.physics.radius,
+        agent.movement.max_speed, agent.movement.max_force,
+        agent.wander_angle, agent.target_id, agent.current_behavior
+    )
+
+class _Fields:
+    """Plain attribute holder standing in for an agent's stat objects"""
+
+    def __init__(self, **fields: Any):
+        self.__dict__.update(fields)
+
+class _Combat(_Fields):
+    def is_alive(self) -> bool:
+        return self.health > 0
+
+    def get_health_percentage(self) -> float:
+        return (self.health / self.max_health) * 100
+
+class SandboxAgent:
+    """Read-only copy of an agent, rebuilt from an AgentRow in the worker"""
+
+    def __init__(self, row: AgentRow):
+        (self.id, self.team, x, y, vx, vy, health, max_health, attack_range,
+         radius, max_speed, max_force, self.wander_angle, self.target_id,
+         self.current_behavior) = row
+        self.position = Vector2D(x, y)
+        self.velocity = Vector2D(vx, vy)
+        self.physics = _Fields(position=self.position, velocity=self.velocity, radius=radius)
+        self.combat = _Combat(health=health, max_health=max_health, attack_range=attack_range)
+        self.movement = _Fields(max_speed=max_speed, max_force=max_force)
+        # Walls live in the simulation process
+        self.world = None
+
+class _BrokenBehavior:
+    """Stands in for code that failed to compile, so it is not retried per request"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+    def execute(self, context: BehaviorContext) -> Vector2D:
+        raise RuntimeError(self.error)
+
+# First message a worker sends, once it can take requests
+READY = "ready"
+
+# (agent id, behavior id, source hash, {zone value: [agent ids]}, time in behavior)
+Task = Tuple[str, str, str, Dict[str, List[str]], float]
+
+def run_tasks(behaviors: Dict[str, Any], agents: Dict[str, AgentRow], tasks: List[Task],
+              progress: Any = None) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, str]]:
+    """
+    Run behaviors for a batch of agents; returns (forces, errors) by agent id.
+    Tasks arrive grouped by behavior; progress (a shared int) is set to the
+    index of the group running so the pool can tell which behavior hung.
+    """
+    views = {agent_id: SandboxAgent(row) for agent_id, row in agents.items()}
+    forces: Dict[str, Tuple[float, float]] = {}
+    errors: Dict[str, str] = {}
+    for group, (_, group_tasks) in enumerate(groupby(tasks, key=lambda task: task[1])):
+        if progress is not None:
+            progress.value = group
+        group_tasks = list(group_tasks)
+        behavior = behaviors.get(group_tasks[0][2])
+        if behavior is not None and hasattr(behavior, "execute_batch"):
+            _run_batch(behavior, views, group_tasks, forces, errors)
+        else:
+            _run_each(behavior, views, group_tasks, forces, errors)
+    return forces, errors
+
+def _run_batch(behavior: Any, views: Dict[str, SandboxAgent], tasks: List[Task],
+               forces: Dict[str, Tuple[float, float]], errors: Dict[str, str]) -> None:
+    """One execute_batch() call for every task of a behavior"""
+    subjects = [views[task[0]] for task in tasks]
+    neighbors = []
+    for _, _, _, zones, _ in tasks:
+        # Zones nest, but take the union in case a config makes them overlap oddly
+        ids = dict.fromkeys(other for zone_ids in zones.values() for other in zone_ids)
+        neighbors.append([views[other] for other in ids])
+    try:
+        batch = BehaviorBatch(subjects, neighbors)
+        for agent_id, force in zip(batch.ids, batch.to_forces(behavior.execute_batch(batch))):
+            forces[agent_id] = (force.x, force.y)
+    except Exception as e:
+        for task in tasks:
+            errors[task[0]] = f"{type(e).__name__}: {e}"
+
+def _run_each(behavior: Any, views: Dict[str, SandboxAgent], tasks: List[Task],
+              forces: Dict[str, Tuple[float, float]], errors: Dict[str, str]) -> None:
+    """execute(context) per task"""
+    for agent_id, behavior_id, source_hash, zones, time_in_behavior in tasks:
+        if behavior is None:
+            errors[agent_id] = f"missing:{source_hash}"
+            continue
+        try:
+            context = BehaviorContext(
+                agent=views[agent_id],
+                agents_by_zone={
+                    ZoneType(zone): [views[other] for other in ids]
+                    for zone, ids in zones.items()
+                },
+                current_behavior=behavior_id,
+                time_in_behavior=time_in_behavior
+            )
+            force = behavior.execute(context)
+            forces[agent_id] = (float(force.x), float(force.y))
+        except Exception as e:
+            errors[agent_id] = f"{type(e).__name__}: {e}"
+
+def run_worker(conn: Any, progress: Any = None) -> None:
+    """
+    Worker process main loop.
+    Sends READY once imports are done; then requests are
+    (request id, {source hash: (behavior id, code)}, agents, tasks) and
+    replies are (request id, forces, errors). None shuts the worker down.
+    """
+    behaviors: "OrderedDict[str, Any]" = OrderedDict()
+    conn.send(READY)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+
+        request_id, sources, agents, tasks = message
+        for source_hash, (behavior_id, code) in sources.items():
+            try:
+                behaviors[source_hash] = compile_behavior(behavior_id, code)
+            except Exception as e:
+                behaviors[source_hash] = _BrokenBehavior(f"{type(e).__name__}: {e}")
+            while len(behaviors) > BEHAVIOR_CACHE_SIZE:
+                behaviors.popitem(last=False)
+        for _, _, source_hash, _, _ in tasks:
+            if source_hash in behaviors:
+                behaviors.move_to_end(source_hash)
+
+        forces, errors = run_tasks(behaviors, agents, tasks, progress)
+        conn.send((request_id, forces, errors))
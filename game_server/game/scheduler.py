@@ -0,0 +1,44 @@
+# game_server/game/scheduler.py
+
+from typing import Dict
+from .constants import SIMULATION_HZ
+
+class DecisionScheduler:
+    """
+    Spreads agents' behavior decisions over time slices.
+    Each agent gets a phase in [0, interval) round-robin when added, so the
+    slices stay balanced; it re-decides on ticks where
+    (tick + phase) % interval == 0 and keeps its stored force otherwise.
+    """
+
+    def __init__(self, interval_ticks: int = 1):
+        self.interval = max(1, int(interval_ticks))
+        self.phases: Dict[str, int] = {}
+        self._next_phase = 0
+
+    @staticmethod
+    def ticks_for(interval_ms: float, simulation_hz: float = SIMULATION_HZ) -> int:
+        """Convert a decision interval in milliseconds to whole ticks (at least 1)"""
+        return max(1, round(interval_ms / 1000 * simulation_hz))
+
+    def set_interval(self, interval_ticks: int) -> None:
+        """Change the interval and rebalance every agent's phase"""
+        interval_ticks = max(1, int(interval_ticks))
+        if interval_ticks == self.interval:
+            return
+        self.interval = interval_ticks
+        for index, agent_id in enumerate(self.phases):
+            self.phases[agent_id] = index % interval_ticks
+        self._next_phase = len(self.phases) % interval_ticks
+
+    def add(self, agent_id: str) -> None:
+        self.phases[agent_id] = self._next_phase
+        self._next_phase = (self._next_phase + 1) % self.interval
+
+    def remove(self, agent_id: str) -> None:
+        self.phases.pop(agent_id, None)
+
+    def is_due(self, agent_id: str, tick: int) -> bool:
+        """Check if an agent should re-decide on this tick (unknown agents always do)"""
+        phase = self.phases.get(agent_id)
+        return phase is None or (tick + phase) % self.interval == 0
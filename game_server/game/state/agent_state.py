@@ -1,19 +1,36 @@
 # game_server/game/state/agent_state.py
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 from loguru import logger
 
 from ..models import Agent
-from ..behaviors import BehaviorType
+from ..behaviors import BehaviorType, AwarenessSystem
 from ..vector import Vector2D
 from .combat_state import CombatState
 from ..world.world import World
+from ..physics.spatial_grid import SpatialGrid
+from ..physics.agent_store import AgentStore
+from ..scheduler import DecisionScheduler
+from ..profiler import profiler
+from ..constants import DECISION_INTERVAL_MS
+
+if TYPE_CHECKING:
+    from ..behavior_manager import BehaviorManager
 
 class AgentState:
-    def __init__(self, combat_state: CombatState, bounds: tuple):
+    def __init__(self, combat_state: CombatState, bounds: tuple,
+                 behavior_manager: Optional['BehaviorManager'] = None):
         self.agents: Dict[str, Agent] = {}
+        # Custom/assigned behaviors; agents without one use their own behavior system
+        self.behavior_manager = behavior_manager
+        # Contiguous kinematics for the batched physics step
+        self.store = AgentStore()
         self.combat_state = combat_state
         self.bounds = bounds
+        # Cell size matches the widest awareness zone (VISUAL by default)
+        self.spatial_grid = SpatialGrid(cell_size=AwarenessSystem().max_range)
+        # Agents re-decide every few ticks, staggered; physics runs every tick
+        self.scheduler = DecisionScheduler(DecisionScheduler.ticks_for(DECISION_INTERVAL_MS))
 
     def add_agent(self, team: str, position: Vector2D, world: World) -> str:
         """Add a new agent to the game"""
@@ -27,6 +44,9 @@ class AgentState:
             )
             
             self.agents[agent.id] = agent
+            self.store.add(agent)
+            self.spatial_grid.insert(agent)
+            self.scheduler.add(agent.id)
             
             # Update combat stats
             self.combat_state.update_team_count(team, 1)
@@ -48,16 +68,61 @@ class AgentState:
                 
                 # Remove from active agents
                 del self.agents[agent_id]
+                self.store.remove(agent_id)
+                self.spatial_grid.remove(agent_id)
+                self.scheduler.remove(agent_id)
+                if self.behavior_manager is not None:
+                    self.behavior_manager.remove_agent(agent_id)
                 
             except Exception as e:
                 logger.error(f"Error removing agent {agent_id}: {e}")
                 raise
 
-    def update_behaviors(self) -> None:
-        """Update all agent behaviors"""
-        agents_list = list(self.agents.values())
+    def set_decision_interval(self, interval_ms: float) -> None:
+        """Set how often each agent re-decides (config behaviorUpdateInterval)"""
+        self.scheduler.set_interval(DecisionScheduler.ticks_for(interval_ms))
+
+    def update_behaviors(self, tick: Optional[int] = None) -> None:
+        """
+        Update behaviors of the agents due on this tick (all agents when
+        tick is None); the rest keep their stored force.
+        """
+        self.spatial_grid.sync(list(self.agents.values()))
+        if tick is None:
+            agents_list = list(self.agents.values())
+        else:
+            # New agents decide right away instead of waiting for their slot
+            agents_list = [
+                agent for agent in self.agents.values()
+                if agent.physics.stored_force is None or self.scheduler.is_due(agent.id, tick)
+            ]
+        profiler.incr("decisions", len(agents_list))
+
+        manager = self.behavior_manager
+        forces: Dict[str, Vector2D] = {}
+        if manager is not None:
+            manager.begin_tick()
+            # Assigned behaviors run grouped, so batch behaviors get one call
+            assigned = [agent for agent in agents_list if manager.has_assigned_behavior(agent.id)]
+            if assigned:
+                forces = manager.execute_behaviors(assigned, self.spatial_grid)
         for agent in agents_list:
-            agent.update_behavior(agents_list)
+            nearby_agents = self.spatial_grid.get_candidates(
+                agent.position,
+                agent.behavior_system.awareness.max_range
+            )
+            agent.update_behavior(nearby_agents, forces.get(agent.id))
+        if manager is not None:
+            manager.end_tick()
+
+    def update_combat(self) -> None:
+        """Resolve this tick's attacks in one batched pass"""
+        agents_by_slot = [self.agents[agent_id] for agent_id in self.store.ids]
+        self.combat_state.resolve_attacks(agents_by_slot, self.store)
+
+    def get_agents_in_radius(self, position: Vector2D, radius: float, exclude_id: Optional[str] = None) -> List[Agent]:
+        """Get agents within radius of a position using the spatial grid"""
+        return self.spatial_grid.query_radius(position, radius, exclude_id)
 
     def get_agents_list(self) -> List[Agent]:
         """Get list of all active agents"""
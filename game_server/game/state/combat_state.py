@@ -1,22 +1,112 @@
 # game_server/game/state/combat_state.py
 
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
 from loguru import logger
 
+from data.telemetry_service import telemetry
 from ..models import Agent, DeadAgent, GameStats
+from ..physics.agent_store import AgentStore
+from ..profiler import profiler
+from ..constants import DEAD_AGENTS_HISTORY
+
+@dataclass
+class DamageRecord:
+    """Damage one attacker has dealt to one victim"""
+    team: str
+    damage: float = 0.0
+    last_hit: int = 0   # Attack pass of the latest hit
 
 @dataclass
 class CombatState:
-    def __init__(self):
+    def __init__(self, match_id: Optional[str] = None):
+        self.match_id = match_id
         self.stats = GameStats()
-        self.dead_agents: List[DeadAgent] = []
+        # Ring buffer of recent deaths; the full history goes to telemetry
+        self.dead_agents: Deque[DeadAgent] = deque(maxlen=DEAD_AGENTS_HISTORY)
         self.recent_kills: List[Dict[str, Any]] = []
+        # victim id -> attacker id -> damage dealt, for kill attribution
+        self.damage_ledger: Dict[str, Dict[str, DamageRecord]] = {}
+        self.attack_pass = 0
+
+    def resolve_attacks(self, agents_by_slot: List[Agent], store: AgentStore) -> int:
+        """
+        Two-phase attack resolution: collect every agent's attack intent
+        against the same pre-attack state, then apply all damage at once.
+        agents_by_slot[i] is the agent in store slot i. Returns hits landed.
+        """
+        self.attack_pass += 1
+        now = time.time()
+
+        # Phase 1: intents (attacker slot -> target slot), looked up by id
+        attacker_slots: List[int] = []
+        target_slots: List[int] = []
+        for slot, agent in enumerate(agents_by_slot):
+            if not agent.target_id or not agent.combat.can_attack():
+                continue
+            target_slot = store.slots.get(agent.target_id)
+            if target_slot is not None and target_slot != slot:
+                attacker_slots.append(slot)
+                target_slots.append(target_slot)
+        if not attacker_slots:
+            return 0
+
+        attackers = np.asarray(attacker_slots, dtype=np.intp)
+        targets = np.asarray(target_slots, dtype=np.intp)
+        offset = store.position[targets] - store.position[attackers]
+        attack_range = np.fromiter(
+            (agents_by_slot[slot].combat.attack_range for slot in attacker_slots),
+            dtype=np.float64, count=len(attacker_slots)
+        )
+        in_range = np.hypot(offset[:, 0], offset[:, 1]) <= attack_range
+        attackers = attackers[in_range]
+        targets = targets[in_range]
+        if len(attackers) == 0:
+            return 0
+
+        # Phase 2: sum damage per victim, record it, then apply it
+        damage = np.fromiter(
+            (agents_by_slot[slot].combat.attack_damage for slot in attackers),
+            dtype=np.float64, count=len(attackers)
+        )
+        for attacker_slot, target_slot, amount in zip(attackers.tolist(), targets.tolist(), damage.tolist()):
+            attacker = agents_by_slot[attacker_slot]
+            attacker.combat.last_attack_time = now
+            ledger = self.damage_ledger.setdefault(agents_by_slot[target_slot].id, {})
+            record = ledger.get(attacker.id)
+            if record is None:
+                record = ledger[attacker.id] = DamageRecord(team=attacker.team)
+            record.damage += amount
+            record.last_hit = self.attack_pass
+
+        total = np.bincount(targets, weights=damage, minlength=len(agents_by_slot))
+        for target_slot in np.flatnonzero(total).tolist():
+            agents_by_slot[target_slot].combat.take_damage(float(total[target_slot]))
+
+        profiler.incr("attacks", len(attackers))
+        return len(attackers)
+
+    def get_killer(self, victim_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Credit a kill to the attacker with the most damage among those who
+        hit in the fatal pass. Returns (killer id, killer team).
+        """
+        ledger = self.damage_ledger.get(victim_id)
+        if not ledger:
+            return None, None
+        last_hit = max(record.last_hit for record in ledger.values())
+        killer_id, record = max(
+            ((attacker_id, record) for attacker_id, record in ledger.items() if record.last_hit == last_hit),
+            key=lambda item: (item[1].damage, item[0])
+        )
+        return killer_id, record.team
 
     def resolve_combat(self, agents: List[Agent]) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
-        Resolve combat for all agents
+        Find agents killed this tick
         Returns: Tuple of (agents to remove, kill events)
         """
         agents_to_remove = []
@@ -24,19 +114,13 @@ class CombatState:
 
         for agent in agents:
             if not agent.combat.is_alive():
-                killer_team = None
-                if agent.target_id:
-                    killer = next((a for a in agents if a.id == agent.target_id), None)
-                    if killer:
-                        killer_team = killer.team
-                
-                # Record kill event
+                killer_id, killer_team = self.get_killer(agent.id)
                 kill_events.append({
                     "victim_id": agent.id,
                     "victim_team": agent.team,
+                    "killer_id": killer_id,
                     "killer_team": killer_team
                 })
-                
                 agents_to_remove.append(agent.id)
 
         return agents_to_remove, kill_events
@@ -44,6 +128,8 @@ class CombatState:
     def handle_agent_death(self, agent: Agent, killer_team: Optional[str] = None) -> None:
         """Handle agent death and update statistics"""
         try:
+            self.damage_ledger.pop(agent.id, None)
+
             # Create dead agent record
             dead_agent = DeadAgent(
                 id=agent.id,
@@ -52,6 +138,7 @@ class CombatState:
                 lifetime=time.time() - agent.combat.last_attack_time
             )
             self.dead_agents.append(dead_agent)
+            telemetry.record("deaths", {"match_id": self.match_id, **dead_agent.to_dict()})
             
             # Update team statistics
             if agent.team == "red":
@@ -76,6 +76,12 @@ class ConfigState:
         Agent.RECOGNITION_RANGE = params.get('recognitionRange', 100)
         Agent.COMBAT_RANGE = params.get('combatRange', 30)
 
+    def get_parameters(self) -> Dict[str, Any]:
+        """Parameters of the active configuration (empty if none)"""
+        if not self.active_config:
+            return {}
+        return self.active_config.get('parameters', {})
+
     def get_config_state(self) -> Dict[str, Any]:
         """Get current configuration state"""
         if self.active_config:
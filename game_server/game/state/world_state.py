@@ -1,17 +1,23 @@
 # game_server/game/state/world_state.py
 
+import json
 from typing import Dict, Any, List, Tuple, Optional
 from loguru import logger
 from ..world.world import World
 from ..world.wall import Wall
 from ..vector import Vector2D
-from ..physics.collision import CollisionInfo, resolve_collision
+from ..physics.collision import CollisionInfo, resolve_collision, batch_circle_box_collision, batch_resolve_collision
+from ..physics.agent_store import AgentStore
+from ..constants import UPDATE_INTERVAL
 import random
+import numpy as np
 
 class WorldState:
     def __init__(self, bounds: Tuple[float, float, float, float]):
         self.bounds = bounds
         self.world = World()
+        # (geometry version, state dict, encoded JSON) of the last serialization
+        self._state_cache: Optional[Tuple[int, Dict[str, Any], str]] = None
         
     def initialize(self) -> None:
         """Initialize world state"""
@@ -37,8 +43,13 @@ class WorldState:
             (self.bounds[1] + self.bounds[3]) / 2
         )
 
-    def update_physics(self, agents: List['Agent']) -> None:
+    def update_physics(self, agents: List['Agent'], store: Optional[AgentStore] = None,
+                       dt: float = UPDATE_INTERVAL) -> None:
         """Update physics and handle collisions for all agents"""
+        if store is not None:
+            self._update_physics_batched(store, dt)
+            return
+
         # Store original positions
         original_positions: Dict[str, Tuple[Vector2D, Vector2D]] = {
             agent.id: (
@@ -50,7 +61,7 @@ class WorldState:
 
         # Update positions
         for agent in agents:
-            agent.physics.update(agent.movement)
+            agent.physics.update(agent.movement, dt)
 
         # Check and resolve collisions
         for agent in agents:
@@ -72,6 +83,50 @@ class WorldState:
                 agent.position = new_pos
                 agent.velocity = new_vel
 
+    def _update_physics_batched(self, store: AgentStore, dt: float) -> None:
+        """Integrate and resolve wall collisions for every stored agent at once"""
+        n = len(store)
+        if n == 0:
+            return
+
+        store.gather_forces()
+        original_positions, original_velocities = store.integrate(dt)
+
+        # Distance field lookup first; only agents near a wall go on to
+        # the exact circle-vs-wall test
+        positions = store.position[:n]
+        radii = store.radius[:n]
+        near = self.world.near_wall_mask(positions, radii)
+        if near is None:
+            candidates = np.arange(n)
+        else:
+            candidates = np.flatnonzero(near)
+            if candidates.size == 0:
+                return
+
+        # Wall broadphase: only walls in the cells each circle covers
+        candidate_positions = positions[candidates]
+        candidate_radii = radii[candidates]
+        wall_index = self.world.wall_index
+        circles, walls = wall_index.query_circle_pairs(candidate_positions, candidate_radii)
+        colliding, normals, penetrations = batch_circle_box_collision(
+            candidate_positions,
+            candidate_radii,
+            circles,
+            wall_index.boxes()[walls]
+        )
+        if colliding.any():
+            hit = candidates[colliding]
+            # Resolve from the pre-step state, as in the per-agent path
+            new_pos, new_vel = batch_resolve_collision(
+                original_positions[hit],
+                original_velocities[hit],
+                normals[colliding],
+                penetrations[colliding]
+            )
+            store.position[hit] = new_pos
+            store.velocity[hit] = new_vel
+
     def add_wall(self, x: float, y: float, width: float, height: float, name: str = "Wall") -> None:
         """Add a new wall to the world"""
         wall = Wall(
@@ -83,9 +138,29 @@ class WorldState:
         self.world.add_wall(wall)
         logger.info(f"Added wall '{name}' at ({x}, {y}), size ({width}x{height})")
 
+    @property
+    def version(self) -> int:
+        """Geometry version of the world; changes when walls do"""
+        return self.world.geometry_version
+
+    def _cached_state(self) -> Tuple[int, Dict[str, Any], str]:
+        version = self.world.geometry_version
+        if self._state_cache is None or self._state_cache[0] != version:
+            state = self._build_state(version)
+            self._state_cache = (version, state, json.dumps(state, separators=(",", ":")))
+        return self._state_cache
+
     def get_state(self) -> Dict[str, Any]:
-        """Get current world state for serialization"""
+        """Get current world state for serialization (cached per geometry version)"""
+        return self._cached_state()[1]
+
+    def get_encoded_state(self) -> str:
+        """get_state() already encoded as compact JSON"""
+        return self._cached_state()[2]
+
+    def _build_state(self, version: int) -> Dict[str, Any]:
         return {
+            "version": version,
             "walls": [
                 {
                     "name": wall.name,
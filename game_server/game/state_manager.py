@@ -1,29 +1,45 @@
 # game_server/game/state.py
 
 import time
-from typing import Dict, Any, List, Optional
+import uuid
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 from loguru import logger
 
+from data.telemetry_service import telemetry
 from .models import Agent, DeadAgent, GameStats
 from .behaviors import BehaviorType
 from .state.config_state import ConfigState
 from .state.world_state import WorldState
 from .state.combat_state import CombatState
 from .state.agent_state import AgentState
+from .constants import (
+    UPDATE_INTERVAL, SIMULATION_HZ, COMBAT_HZ, DECISION_INTERVAL_MS, TELEMETRY_STATS_INTERVAL
+)
+from .profiler import profiler
+
+if TYPE_CHECKING:
+    from .behavior_manager import BehaviorManager
 
 GAME_BOUNDS = (0, 0, 800, 600)
 
 @dataclass
 class GameState:
-    def __init__(self):
+    def __init__(self, behavior_manager: Optional['BehaviorManager'] = None):
         self.is_running: bool = False
+        self.tick: int = 0  # Simulation steps run so far
+        # Attacks and deaths are resolved every N ticks
+        self.combat_interval = max(1, round(SIMULATION_HZ / COMBAT_HZ))
+        # GameStats are written to telemetry every N ticks
+        self.stats_interval = max(1, round(TELEMETRY_STATS_INTERVAL * SIMULATION_HZ))
+        # Tags this game's telemetry records
+        self.match_id = uuid.uuid4().hex
         
         # Initialize state managers
-        self.combat_state = CombatState()
+        self.combat_state = CombatState(self.match_id)
         self.config_state = ConfigState()
         self.world_state = WorldState(GAME_BOUNDS)
-        self.agent_state = AgentState(self.combat_state, GAME_BOUNDS)
+        self.agent_state = AgentState(self.combat_state, GAME_BOUNDS, behavior_manager)
         
         # Initialize world
         self.world_state.initialize()
@@ -53,6 +69,10 @@ class GameState:
             
         # Apply global settings
         self.config_state.apply_global_config()
+        params = self.config_state.get_parameters()
+        self.agent_state.set_decision_interval(
+            params.get('behaviorUpdateInterval', DECISION_INTERVAL_MS)
+        )
 
     def add_agent(self, team: str) -> str:
         """Add a new agent to the game"""
@@ -74,43 +94,61 @@ class GameState:
         """Remove an agent and update statistics"""
         self.agent_state.remove_agent(agent_id, killer_team)
 
-    def update(self) -> Dict[str, Any]:
-        """Main update loop"""
+    def update(self, dt: float = UPDATE_INTERVAL, snapshot: bool = True) -> Dict[str, Any]:
+        """
+        Advance the simulation by one fixed timestep of dt seconds.
+        With snapshot=False the agent list and world are not serialized.
+        """
         if not self.is_running:
             return {
+                "tick": self.tick,
                 "timestamp": int(time.time() * 1000),
                 "agents": [],
                 "stats": self.combat_state.stats.to_dict()
             }
             
         try:
+            self.tick += 1
             self.combat_state.clear_recent_kills()
             agents_list = self.agent_state.get_agents_list()
             
-            # 1. Behavior Update
-            self.agent_state.update_behaviors()
-
-            # 2. Physics Update
-            self.world_state.update_physics(agents_list)
-
-            # 3. Combat Resolution
-            agents_to_remove, kill_events = self.combat_state.resolve_combat(agents_list)
-            
-            # 4. Remove dead agents
-            for agent_id in agents_to_remove:
-                killer_team = next(
-                    (event["killer_team"] for event in kill_events 
-                     if event["victim_id"] == agent_id),
-                    None
-                )
-                self.agent_state.remove_agent(agent_id, killer_team)
+            # 1. Behavior Update (agents due on this tick re-decide)
+            with profiler.phase("behavior"):
+                self.world_state.world.update()
+                self.agent_state.update_behaviors(self.tick)
+
+            # 2. Physics Update (every tick, using each agent's stored force)
+            with profiler.phase("physics"):
+                self.world_state.update_physics(agents_list, self.agent_state.store, dt)
+
+            if self.tick % self.combat_interval == 0:
+                # 3. Combat Resolution
+                with profiler.phase("combat"):
+                    self.agent_state.update_combat()
+                    _, kill_events = self.combat_state.resolve_combat(agents_list)
+
+                # 4. Remove dead agents
+                with profiler.phase("removal"):
+                    for event in kill_events:
+                        self.agent_state.remove_agent(event["victim_id"], event["killer_team"])
+                        telemetry.record("kills", {"match_id": self.match_id, "tick": self.tick, **event})
+
+            if self.tick % self.stats_interval == 0:
+                telemetry.record("game_stats", {
+                    "match_id": self.match_id,
+                    "tick": self.tick,
+                    **self.combat_state.stats.to_dict()
+                })
                     
-            state_update = {
-                "timestamp": int(time.time() * 1000),
-                "agents": self.agent_state.get_state(),
-                "stats": self.combat_state.stats.to_dict(),
-                "world": self.world_state.get_state()
-            }
+            if snapshot:
+                state_update = self.get_snapshot()
+            else:
+                state_update = {
+                    "tick": self.tick,
+                    "timestamp": int(time.time() * 1000),
+                    "stats": self.combat_state.stats.to_dict(),
+                    "world_version": self.world_state.version
+                }
             
             combat_state = self.combat_state.get_state()
             if combat_state["recent_kills"]:
@@ -122,6 +160,18 @@ class GameState:
             logger.error(f"Error updating game state: {e}")
             raise
 
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Serialize the agents for a per-tick snapshot"""
+        with profiler.phase("serialize"):
+            return {
+                "tick": self.tick,
+                "timestamp": int(time.time() * 1000),
+                "agents": self.agent_state.get_state(),
+                "stats": self.combat_state.stats.to_dict(),
+                # Walls are sent separately, only when this changes
+                "world_version": self.world_state.version
+            }
+
     def get_state_update(self) -> Dict[str, Any]:
         """Get full state update"""
         return {
@@ -131,6 +181,7 @@ class GameState:
                 "blue": self.combat_state.stats.blue_agents
             },
             "stats": self.combat_state.stats.to_dict(),
+            "tick": self.tick,
             "timestamp": int(time.time() * 1000),
             "world": self.world_state.get_state(),
             "config": self.config_state.get_config_state(),
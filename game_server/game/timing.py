@@ -0,0 +1,80 @@
+# game_server/game/timing.py
+
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable
+
+class RollingWindow:
+    """Fixed-size window of recent samples with percentile queries"""
+
+    def __init__(self, size: int = 600):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.count = 0  # Total samples ever recorded
+
+    def record(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+
+    def clear(self) -> None:
+        self.samples.clear()
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the current window (0 if empty)"""
+        return self.percentiles((p,))[f"p{p:g}"]
+
+    def percentiles(self, ps: Iterable[float] = (50, 90, 99)) -> Dict[str, float]:
+        """Several percentiles from a single sort, keyed as 'p50', 'p99', ..."""
+        if not self.samples:
+            return {f"p{p:g}": 0.0 for p in ps}
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        return {
+            f"p{p:g}": ordered[max(0, min(n - 1, math.ceil(p / 100 * n) - 1))]
+            for p in ps
+        }
+
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def max(self) -> float:
+        return max(self.samples) if self.samples else 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+class TickTimingStats:
+    """Tick duration and scheduling health of the fixed-timestep loop"""
+
+    def __init__(self, window: int = 600):
+        self.tick_durations = RollingWindow(window)
+        self.frame_durations = RollingWindow(window)
+        self.ticks = 0
+        self.overruns = 0         # Ticks that took longer than the timestep
+        self.catchup_frames = 0   # Frames that ran more than one substep
+        self.dropped_ticks = 0    # Substeps skipped after hitting the catch-up cap
+
+    def record_tick(self, duration: float, budget: float) -> None:
+        self.ticks += 1
+        self.tick_durations.record(duration)
+        if duration > budget:
+            self.overruns += 1
+
+    def record_frame(self, duration: float, substeps: int) -> None:
+        self.frame_durations.record(duration)
+        if substeps > 1:
+            self.catchup_frames += 1
+
+    def to_dict(self) -> Dict[str, float]:
+        """Timing summary in milliseconds"""
+        tick_ms = {k: v * 1000 for k, v in self.tick_durations.percentiles((50, 90, 99)).items()}
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "catchup_frames": self.catchup_frames,
+            "dropped_ticks": self.dropped_ticks,
+            "tick_ms": {
+                **tick_ms,
+                "mean": self.tick_durations.mean() * 1000,
+                "max": self.tick_durations.max() * 1000
+            }
+        }
@@ -0,0 +1,116 @@
+# game_server/game/world/broadphase.py
+
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .wall import Wall
+
+Cell = Tuple[int, int]
+
+class WallGrid:
+    """
+    Static uniform grid over wall bounding boxes.
+    Each cell lists the walls whose AABB overlaps it, so collision
+    narrowphase only runs against walls near the query area.
+    """
+
+    def __init__(self, cell_size: float = 64.0):
+        if cell_size <= 0:
+            raise ValueError(f"Invalid cell size: {cell_size}")
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, List[int]] = {}
+        self.walls: List[Wall] = []
+        # (left, top, right, bottom) per wall index; built on demand
+        self._boxes: Optional[np.ndarray] = None
+
+    def _cell_range(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            int(math.floor(min_x / size)),
+            int(math.floor(min_y / size)),
+            int(math.floor(max_x / size)),
+            int(math.floor(max_y / size))
+        )
+
+    def clear(self) -> None:
+        """Remove all walls from the grid"""
+        self.cells.clear()
+        self.walls.clear()
+        self._boxes = None
+
+    def build(self, walls: List[Wall]) -> None:
+        """Rebuild the grid from a wall list"""
+        self.clear()
+        for wall in walls:
+            self.insert(wall)
+
+    def insert(self, wall: Wall) -> None:
+        """Register a wall in every cell its bounding box overlaps"""
+        index = len(self.walls)
+        self.walls.append(wall)
+        self._boxes = None
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(*wall.get_bounds())
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self.cells.setdefault((cx, cy), []).append(index)
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Wall]:
+        """
+        Get walls registered in cells overlapping the given box.
+        Walls are returned once each, in insertion order.
+        """
+        min_cx, min_cy, max_cx, max_cy = self._cell_range(min_x, min_y, max_x, max_y)
+        if min_cx == max_cx and min_cy == max_cy:
+            return [self.walls[i] for i in self.cells.get((min_cx, min_cy), ())]
+
+        indices = set()
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    indices.update(bucket)
+        return [self.walls[i] for i in sorted(indices)]
+
+    def boxes(self) -> np.ndarray:
+        """Wall bounds as an (N, 4) array of left, top, right, bottom"""
+        if self._boxes is None:
+            self._boxes = np.array(
+                [wall.get_bounds() for wall in self.walls], dtype=np.float64
+            ).reshape(-1, 4)
+        return self._boxes
+
+    def query_circle_pairs(self, positions: np.ndarray, radii: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Candidate (circle, wall) pairs for many circles at once.
+        Returns two index arrays of equal length; each circle's walls are
+        listed once, in insertion order.
+        """
+        size = self.cell_size
+        min_cells = np.floor((positions - radii[:, None]) / size).astype(np.int64)
+        max_cells = np.floor((positions + radii[:, None]) / size).astype(np.int64)
+        circles: List[int] = []
+        walls: List[int] = []
+        cells = self.cells
+        for i, (min_cx, min_cy), (max_cx, max_cy) in zip(range(len(positions)), min_cells.tolist(), max_cells.tolist()):
+            if min_cx == max_cx and min_cy == max_cy:
+                bucket = cells.get((min_cx, min_cy), ())
+            else:
+                found = set()
+                for cx in range(min_cx, max_cx + 1):
+                    for cy in range(min_cy, max_cy + 1):
+                        found.update(cells.get((cx, cy), ()))
+                bucket = sorted(found)
+            circles.extend([i] * len(bucket))
+            walls.extend(bucket)
+        return np.array(circles, dtype=np.intp), np.array(walls, dtype=np.intp)
+
+    def query_circle(self, x: float, y: float, radius: float) -> List[Wall]:
+        """Get candidate walls for a circle"""
+        return self.query(x - radius, y - radius, x + radius, y + radius)
+
+    def query_point(self, x: float, y: float) -> List[Wall]:
+        """Get candidate walls for a point"""
+        return self.query(x, y, x, y)
+
+    def __len__(self) -> int:
+        return len(self.walls)
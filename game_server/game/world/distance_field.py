@@ -0,0 +1,110 @@
+# game_server/game/world/distance_field.py
+
+import math
+from typing import List, Tuple
+import numpy as np
+from ..vector import Vector2D
+from .wall import Wall
+
+class DistanceField:
+    """
+    Rasterised signed distance field of the walls over a rectangular area.
+    Values are the distance to the nearest wall surface (negative inside a
+    wall), sampled on a regular grid and read back with bilinear filtering.
+    """
+
+    def __init__(self, bounds: Tuple[float, float, float, float], resolution: float,
+                 distances: np.ndarray):
+        self.bounds = bounds
+        self.resolution = resolution
+        self.distances = distances
+        self.height, self.width = distances.shape
+        # np.gradient returns d/dy first for (rows, cols) arrays
+        self.grad_y, self.grad_x = np.gradient(distances, resolution)
+        # Bilinear error bound for a 1-Lipschitz field: one cell diagonal
+        self.margin = resolution * math.sqrt(2)
+
+    @classmethod
+    def build(cls, walls: List[Wall], bounds: Tuple[float, float, float, float],
+              resolution: float) -> 'DistanceField':
+        """Rasterise the signed distance to a set of axis-aligned walls"""
+        if resolution <= 0:
+            raise ValueError(f"Invalid distance field resolution: {resolution}")
+        min_x, min_y, max_x, max_y = bounds
+        nx = int(math.ceil((max_x - min_x) / resolution)) + 1
+        ny = int(math.ceil((max_y - min_y) / resolution)) + 1
+        xs = min_x + np.arange(nx) * resolution
+        ys = min_y + np.arange(ny) * resolution
+        px, py = np.meshgrid(xs, ys)
+
+        # With no walls the whole area is free; use the area diagonal
+        distances = np.full((ny, nx), math.hypot(max_x - min_x, max_y - min_y))
+        for wall in walls:
+            left, top, right, bottom = wall.get_bounds()
+            half_w = (right - left) / 2
+            half_h = (bottom - top) / 2
+            qx = np.abs(px - (left + half_w)) - half_w
+            qy = np.abs(py - (top + half_h)) - half_h
+            outside = np.hypot(np.maximum(qx, 0.0), np.maximum(qy, 0.0))
+            inside = np.minimum(np.maximum(qx, qy), 0.0)
+            np.minimum(distances, outside + inside, out=distances)
+
+        return cls(bounds, resolution, distances)
+
+    def contains(self, x: float, y: float) -> bool:
+        """Check if a point lies inside the rasterised area"""
+        min_x, min_y, max_x, max_y = self.bounds
+        return min_x <= x <= max_x and min_y <= y <= max_y
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int, float, float]:
+        fx = (x - self.bounds[0]) / self.resolution
+        fy = (y - self.bounds[1]) / self.resolution
+        fx = min(max(fx, 0.0), self.width - 1.000001)
+        fy = min(max(fy, 0.0), self.height - 1.000001)
+        i = int(fx)
+        j = int(fy)
+        return i, j, fx - i, fy - j
+
+    @staticmethod
+    def _bilinear(grid: np.ndarray, i: int, j: int, tx: float, ty: float) -> float:
+        top = grid[j, i] * (1 - tx) + grid[j, i + 1] * tx
+        bottom = grid[j + 1, i] * (1 - tx) + grid[j + 1, i + 1] * tx
+        return float(top * (1 - ty) + bottom * ty)
+
+    def sample(self, x: float, y: float) -> float:
+        """Signed distance to the nearest wall at a point"""
+        i, j, tx, ty = self._cell(x, y)
+        return self._bilinear(self.distances, i, j, tx, ty)
+
+    def gradient(self, x: float, y: float) -> Vector2D:
+        """Direction of increasing wall distance at a point (not normalized)"""
+        i, j, tx, ty = self._cell(x, y)
+        return Vector2D(
+            self._bilinear(self.grad_x, i, j, tx, ty),
+            self._bilinear(self.grad_y, i, j, tx, ty)
+        )
+
+    def sample_many(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Vectorized sample over an (N, 2) array.
+        Points outside the rasterised area return -inf so callers treat
+        them as possibly colliding.
+        """
+        min_x, min_y, max_x, max_y = self.bounds
+        x = positions[:, 0]
+        y = positions[:, 1]
+        fx = np.clip((x - min_x) / self.resolution, 0.0, self.width - 1.000001)
+        fy = np.clip((y - min_y) / self.resolution, 0.0, self.height - 1.000001)
+        i = fx.astype(np.intp)
+        j = fy.astype(np.intp)
+        tx = fx - i
+        ty = fy - j
+
+        d = self.distances
+        top = d[j, i] * (1 - tx) + d[j, i + 1] * tx
+        bottom = d[j + 1, i] * (1 - tx) + d[j + 1, i + 1] * tx
+        result = top * (1 - ty) + bottom * ty
+
+        outside = (x < min_x) | (x > max_x) | (y < min_y) | (y > max_y)
+        result[outside] = -np.inf
+        return result
@@ -0,0 +1,312 @@
+# game_server/game/world/navigation.py
+
+import heapq
+import math
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from ..vector import Vector2D
+from ..profiler import profiler
+from .wall import Wall
+from .distance_field import DistanceField
+
+Cell = Tuple[int, int]  # (column, row)
+
+# 8-connected moves: (dx, dy, cost)
+_SQRT2 = math.sqrt(2)
+_MOVES = [(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+          (1, 1, _SQRT2), (1, -1, _SQRT2), (-1, 1, _SQRT2), (-1, -1, _SQRT2)]
+
+class FlowField:
+    """
+    Geodesic distance from every free cell to one goal cell, plus the
+    direction of steepest descent. Computed once per goal and shared by
+    every agent heading to (or away from) it.
+    """
+
+    def __init__(self, grid: 'NavGrid', goal: Cell, cost: np.ndarray):
+        self.grid = grid
+        self.goal = goal
+        self.cost = cost
+        self.toward, self.away = self._directions(cost)
+
+    def _directions(self, cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-cell index into _MOVES of the cheapest and dearest reachable neighbour"""
+        height, width = cost.shape
+        padded = np.pad(cost, 1, constant_values=np.inf)
+        neighbours = np.stack([
+            np.where(valid, padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width], np.inf)
+            for (dx, dy, _), valid in zip(_MOVES, self.grid.moves)
+        ])
+        toward = np.argmin(neighbours, axis=0)
+        away = np.argmax(np.where(np.isfinite(neighbours), neighbours, -np.inf), axis=0)
+        return toward, away
+
+    def _direction(self, x: float, y: float, moves: np.ndarray) -> Optional[Vector2D]:
+        cell = self.grid.nearest_free(self.grid.cell_of(x, y))
+        if cell is None or not np.isfinite(self.cost[cell[1], cell[0]]):
+            return None
+        if cell == self.goal:
+            return None
+        move = int(moves[cell[1], cell[0]])
+        if not self.grid.moves[move][cell[1], cell[0]]:
+            return None
+        dx, dy, _ = _MOVES[move]
+        # Head for the next cell's centre so agents converge on the free lane
+        target = self.grid.center_of((cell[0] + dx, cell[1] + dy))
+        return Vector2D(target.x - x, target.y - y).normalize()
+
+    def direction_to_goal(self, x: float, y: float) -> Optional[Vector2D]:
+        """Unit direction along the shortest path to the goal (None at or cut off from it)"""
+        return self._direction(x, y, self.toward)
+
+    def direction_from_goal(self, x: float, y: float) -> Optional[Vector2D]:
+        """Unit direction that most increases the path distance from the goal"""
+        return self._direction(x, y, self.away)
+
+class NavGrid:
+    """
+    Occupancy grid of the walls, inflated by an agent radius, with A* path
+    queries and per-goal flow fields. Both are LRU cached; the grid is
+    built for one geometry version and replaced when the walls change.
+    """
+
+    def __init__(self, walls: List[Wall], bounds: Tuple[float, float, float, float],
+                 cell_size: float, agent_radius: float, geometry_version: int,
+                 path_cache_size: int = 256, flow_cache_size: int = 32, goal_span: int = 1,
+                 flow_builds_per_tick: Optional[int] = None):
+        self.bounds = bounds
+        self.cell_size = cell_size
+        self.geometry_version = geometry_version
+        # Grid points are cell centres; blocked where a wall is closer than the radius
+        field = DistanceField.build(walls, bounds, cell_size)
+        self.blocked = field.distances < agent_radius
+        self.height, self.width = self.blocked.shape
+        self._blocked_rows: List[List[bool]] = self.blocked.tolist()
+        self.moves = self._move_masks()
+        self.path_cache_size = path_cache_size
+        self.flow_cache_size = flow_cache_size
+        self.goal_span = max(1, goal_span)
+        # New flow fields allowed per tick (None: unlimited); see begin_tick
+        self.flow_builds_per_tick = flow_builds_per_tick
+        self._flow_builds_left = flow_builds_per_tick
+        self._adjacent: Optional[List[List[Tuple[int, float]]]] = None
+        self._paths: "OrderedDict[Tuple[Cell, Cell], Optional[List[Cell]]]" = OrderedDict()
+        self._flows: "OrderedDict[Cell, FlowField]" = OrderedDict()
+
+    def begin_tick(self) -> None:
+        """Refill the flow field build budget"""
+        self._flow_builds_left = self.flow_builds_per_tick
+
+    def cell_of(self, x: float, y: float) -> Cell:
+        i = int(round((x - self.bounds[0]) / self.cell_size))
+        j = int(round((y - self.bounds[1]) / self.cell_size))
+        return min(max(i, 0), self.width - 1), min(max(j, 0), self.height - 1)
+
+    def center_of(self, cell: Cell) -> Vector2D:
+        return Vector2D(self.bounds[0] + cell[0] * self.cell_size,
+                        self.bounds[1] + cell[1] * self.cell_size)
+
+    def is_free(self, cell: Cell) -> bool:
+        i, j = cell
+        return 0 <= i < self.width and 0 <= j < self.height and not self.blocked[j, i]
+
+    def nearest_free(self, cell: Cell, max_radius: int = 4) -> Optional[Cell]:
+        """The cell itself if free, else the closest free cell within max_radius rings"""
+        if self.is_free(cell):
+            return cell
+        for radius in range(1, max_radius + 1):
+            best = None
+            best_distance = math.inf
+            for dj in range(-radius, radius + 1):
+                for di in range(-radius, radius + 1):
+                    if max(abs(di), abs(dj)) != radius:
+                        continue
+                    candidate = (cell[0] + di, cell[1] + dj)
+                    distance = di * di + dj * dj
+                    if distance < best_distance and self.is_free(candidate):
+                        best, best_distance = candidate, distance
+            if best is not None:
+                return best
+        return None
+
+    def line_of_sight(self, start: Vector2D, end: Vector2D, skip_ends: bool = False) -> bool:
+        """
+        True if the straight segment stays in free cells. With skip_ends the
+        first and last cell size of it are not checked, so an agent brushing
+        a wall still counts as free to move along it.
+        """
+        length = (end - start).magnitude()
+        margin = 0.0
+        if skip_ends:
+            if length <= 2 * self.cell_size:
+                return True
+            margin = self.cell_size / length
+        # Half-cell steps; a plain loop beats numpy for segments this short
+        steps = max(1, int(length / (self.cell_size * 0.5)))
+        x0 = (start.x - self.bounds[0]) / self.cell_size
+        y0 = (start.y - self.bounds[1]) / self.cell_size
+        dx = (end.x - start.x) / self.cell_size
+        dy = (end.y - start.y) / self.cell_size
+        last_i, last_j = self.width - 1, self.height - 1
+        rows = self._blocked_rows
+        for k in range(steps + 1):
+            t = margin + (1.0 - 2 * margin) * k / steps
+            i = min(max(round(x0 + dx * t), 0), last_i)
+            j = min(max(round(y0 + dy * t), 0), last_j)
+            if rows[j][i]:
+                return False
+        return True
+
+    def _move_masks(self) -> List[np.ndarray]:
+        """Per move in _MOVES, the cells from which that step stays in free cells"""
+        height, width = self.height, self.width
+        free = np.pad(~self.blocked, 1, constant_values=False)
+
+        def shifted(dx: int, dy: int) -> np.ndarray:
+            return free[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+        masks = []
+        for dx, dy, _ in _MOVES:
+            valid = shifted(0, 0) & shifted(dx, dy)
+            if dx and dy:
+                # No cutting corners past a blocked cell
+                valid &= shifted(dx, 0) & shifted(0, dy)
+            masks.append(valid)
+        return masks
+
+    def _adjacency(self) -> List[List[Tuple[int, float]]]:
+        """(neighbour, step cost) lists per flat cell index, built on first search"""
+        if self._adjacent is None:
+            adjacent: List[List[Tuple[int, float]]] = [[] for _ in range(self.height * self.width)]
+            for (dx, dy, step), valid in zip(_MOVES, self.moves):
+                offset = dy * self.width + dx
+                for index in np.flatnonzero(valid).tolist():
+                    adjacent[index].append((index + offset, step))
+            self._adjacent = adjacent
+        return self._adjacent
+
+    def find_path(self, start: Vector2D, goal: Vector2D) -> Optional[List[Vector2D]]:
+        """
+        Waypoints (cell centres) from start to goal by A*, ending at goal;
+        None if unreachable. Results are cached per (start cell, goal cell).
+        """
+        start_cell = self.nearest_free(self.cell_of(start.x, start.y))
+        goal_cell = self.nearest_free(self.cell_of(goal.x, goal.y))
+        if start_cell is None or goal_cell is None:
+            return None
+
+        key = (start_cell, goal_cell)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            profiler.incr("nav_path_cache_hits")
+            cells = self._paths[key]
+        else:
+            cells = self._astar(start_cell, goal_cell)
+            if cells is not None:
+                cells = self._smooth(cells)
+            self._paths[key] = cells
+            while len(self._paths) > self.path_cache_size:
+                self._paths.popitem(last=False)
+        if cells is None:
+            return None
+        return [self.center_of(cell) for cell in cells[1:-1]] + [goal]
+
+    def _smooth(self, cells: List[Cell]) -> List[Cell]:
+        """Drop waypoints that can be skipped in a straight line"""
+        smoothed = [cells[0]]
+        anchor = 0
+        while anchor < len(cells) - 1:
+            furthest = anchor + 1
+            origin = self.center_of(cells[anchor])
+            for index in range(len(cells) - 1, furthest, -1):
+                if self.line_of_sight(origin, self.center_of(cells[index])):
+                    furthest = index
+                    break
+            smoothed.append(cells[furthest])
+            anchor = furthest
+        return smoothed
+
+    def _astar(self, start: Cell, goal: Cell) -> Optional[List[Cell]]:
+        profiler.incr("nav_astar_searches")
+        adjacent = self._adjacency()
+        width = self.width
+        goal_i, goal_j = goal
+        target = goal_j * width + goal_i
+
+        def heuristic(index: int) -> float:
+            dx = abs(index % width - goal_i)
+            dy = abs(index // width - goal_j)
+            return max(dx, dy) + (_SQRT2 - 1) * min(dx, dy)
+
+        origin = start[1] * width + start[0]
+        open_heap = [(heuristic(origin), 0.0, origin)]
+        came_from = {origin: -1}
+        best = {origin: 0.0}
+        while open_heap:
+            _, cost, index = heapq.heappop(open_heap)
+            if index == target:
+                path = []
+                while index != -1:
+                    path.append((index % width, index // width))
+                    index = came_from[index]
+                return path[::-1]
+            if cost > best[index]:
+                continue
+            for neighbour, step in adjacent[index]:
+                new_cost = cost + step
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    came_from[neighbour] = index
+                    heapq.heappush(open_heap, (new_cost + heuristic(neighbour), new_cost, neighbour))
+        return None
+
+    def flow_field(self, goal: Vector2D) -> Optional[FlowField]:
+        """
+        Shared flow field toward goal, or None if unreachable or over this
+        tick's build budget. Goals are snapped to blocks of goal_span cells
+        so a moving target keeps its field for a while.
+        """
+        i, j = self.cell_of(goal.x, goal.y)
+        span = self.goal_span
+        snapped = (min(i // span * span + span // 2, self.width - 1),
+                   min(j // span * span + span // 2, self.height - 1))
+        goal_cell = self.nearest_free(snapped, max_radius=4 + span)
+        if goal_cell is None:
+            return None
+        field = self._flows.get(goal_cell)
+        if field is not None:
+            self._flows.move_to_end(goal_cell)
+            profiler.incr("nav_flow_cache_hits")
+            return field
+
+        if self._flow_builds_left is not None:
+            if self._flow_builds_left <= 0:
+                # Over budget; callers steer straight and retry next decision
+                profiler.incr("nav_flow_deferred")
+                return None
+            self._flow_builds_left -= 1
+        field = FlowField(self, goal_cell, self._dijkstra(goal_cell))
+        self._flows[goal_cell] = field
+        while len(self._flows) > self.flow_cache_size:
+            self._flows.popitem(last=False)
+        return field
+
+    def _dijkstra(self, goal: Cell) -> np.ndarray:
+        """Path distance (in cells) from every cell to goal; inf where blocked or unreachable"""
+        profiler.incr("nav_flow_fields_built")
+        adjacent = self._adjacency()
+        origin = goal[1] * self.width + goal[0]
+        cost = [math.inf] * (self.height * self.width)
+        cost[origin] = 0.0
+        heap = [(0.0, origin)]
+        while heap:
+            current, index = heapq.heappop(heap)
+            if current > cost[index]:
+                continue
+            for neighbour, step in adjacent[index]:
+                new_cost = current + step
+                if new_cost < cost[neighbour]:
+                    cost[neighbour] = new_cost
+                    heapq.heappush(heap, (new_cost, neighbour))
+        return np.array(cost).reshape(self.height, self.width)
@@ -1,12 +1,30 @@
 # game_server/game/world/world.py
 
 import random
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Tuple
 import math
+import numpy as np
+from loguru import logger
 from ..vector import Vector2D
 from .base import Object
 from .wall import Wall
+from .broadphase import WallGrid
+from .distance_field import DistanceField
+from .navigation import FlowField, NavGrid
+from ..constants import (
+    WALL_GRID_CELL_SIZE, SDF_RESOLUTION,
+    NAV_CELL_SIZE, NAV_AGENT_RADIUS, NAV_PATH_CACHE_SIZE, NAV_FLOW_CACHE_SIZE,
+    NAV_FLOW_GOAL_SPAN, NAV_FLOW_BUILDS_PER_TICK
+)
 from ..physics.collision import circle_wall_collision, CollisionInfo, resolve_collision
+from ..profiler import profiler
+
+# Single background worker for distance field rebuilds
+_field_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="distance-field")
+# Process-wide so a regenerated or replaced World never reuses a version
+_geometry_versions = itertools.count(1)
 
 class World:
     """
@@ -14,21 +32,112 @@ class World:
     and topological features like lines (colines) and holes.
     """
 
-    def __init__(self):
+    def __init__(self, sdf_resolution: float = SDF_RESOLUTION):
         self.objects: List[Object] = []
         self.walls: List[Wall] = []
         self.holes: List[Object] = []
         self.colines: List[Object] = []
+        self.bounds: Optional[Tuple[float, float, float, float]] = None
+        # Static broadphase over self.walls
+        self.wall_index = WallGrid(cell_size=WALL_GRID_CELL_SIZE)
+        # Signed distance field; None while missing or being rebuilt
+        self.sdf_resolution = sdf_resolution
+        self.distance_field: Optional[DistanceField] = None
+        # Path-finding grid; built on first query for the current walls
+        self.navigation: Optional[NavGrid] = None
+        # Changes whenever the static geometry does; derived data
+        # (distance field, navigation, client payloads) is keyed on it
+        self.geometry_version = next(_geometry_versions)
+
+    def _geometry_changed(self) -> None:
+        """Invalidate everything derived from the walls"""
+        self.geometry_version = next(_geometry_versions)
+        self.distance_field = None
+        self.navigation = None
+
+    def get_navigation(self) -> Optional[NavGrid]:
+        """Navigation grid for the current walls (None until the world has bounds)"""
+        if self.bounds is None:
+            return None
+        if self.navigation is None:
+            with profiler.phase("nav_grid_build"):
+                self.navigation = NavGrid(
+                    self.walls, self.bounds, NAV_CELL_SIZE, NAV_AGENT_RADIUS,
+                    self.geometry_version, NAV_PATH_CACHE_SIZE, NAV_FLOW_CACHE_SIZE,
+                    NAV_FLOW_GOAL_SPAN, NAV_FLOW_BUILDS_PER_TICK
+                )
+        return self.navigation
+
+    def find_path(self, start: Vector2D, goal: Vector2D) -> Optional[List[Vector2D]]:
+        """Waypoints around the walls from start to goal, or None if unreachable"""
+        navigation = self.get_navigation()
+        return navigation.find_path(start, goal) if navigation else None
+
+    def flow_field(self, goal: Vector2D) -> Optional[FlowField]:
+        """Flow field toward goal, shared by every agent heading there"""
+        navigation = self.get_navigation()
+        return navigation.flow_field(goal) if navigation else None
+
+    def rebuild_distance_field(self, background: bool = False) -> None:
+        """
+        Rebuild the distance field for the current walls.
+        Queries fall back to the broadphase until the new field is ready;
+        a background result is dropped if the geometry changed meanwhile.
+        """
+        self.distance_field = None
+        if self.bounds is None:
+            return
+
+        version = self.geometry_version
+        walls = list(self.walls)
+        bounds = self.bounds
+
+        def build() -> None:
+            try:
+                field = DistanceField.build(walls, bounds, self.sdf_resolution)
+            except Exception as e:
+                logger.error(f"Error building distance field: {e}")
+                return
+            if version == self.geometry_version:
+                self.distance_field = field
+
+        if background:
+            _field_executor.submit(build)
+        else:
+            build()
+
+    def is_clear_of_walls(self, position: Vector2D, radius: float) -> bool:
+        """
+        Cheap conservative test using the distance field.
+        True means the circle certainly touches no wall; False means the
+        exact check is needed (or no field is available).
+        """
+        field = self.distance_field
+        if field is None or not field.contains(position.x, position.y):
+            return False
+        return field.sample(position.x, position.y) > radius + field.margin
+
+    def near_wall_mask(self, positions: np.ndarray, radii: np.ndarray) -> Optional[np.ndarray]:
+        """Vectorized is_clear_of_walls; returns circles that need exact checks"""
+        field = self.distance_field
+        if field is None:
+            return None
+        return field.sample_many(positions) <= radii + field.margin
 
     def check_collisions(self, position: Vector2D, radius: float) -> Optional[CollisionInfo]:
         """
-        Check collisions between an agent and all walls
-        Returns the first collision found or None
+        Check collisions between an agent and nearby walls
+        Returns the closest collision found or None
         """
+        if self.is_clear_of_walls(position, radius):
+            return None
+
         closest_collision: Optional[CollisionInfo] = None
         min_distance = float('inf')
 
-        for wall in self.walls:
+        candidates = self.wall_index.query_circle(position.x, position.y, radius)
+        profiler.incr("wall_narrowphase_tests", len(candidates))
+        for wall in candidates:
             collision = circle_wall_collision(position, radius, wall)
             if collision.is_colliding and collision.point:
                 distance = (collision.point - position).magnitude()
@@ -106,12 +215,21 @@ class World:
             min_gap=30
         )
 
+        # Walls are static from here on; index them once
+        self.bounds = (0, 0, world_width, world_height)
+        self.wall_index.build(self.walls)
+        self._geometry_changed()
+        self.rebuild_distance_field()
+
     def clear_world(self):
         """Clear all objects from the world."""
         self.objects.clear()
         self.walls.clear()
         self.holes.clear()
         self.colines.clear()
+        self.wall_index.clear()
+        # Drops the field and any in-flight rebuild for the old walls
+        self._geometry_changed()
 
     def _generate_corner_walls(self, width: float, height: float, min_size: float, max_size: float):
         """Generate walls in the corners of the world."""
@@ -246,16 +364,28 @@ class World:
     def add_wall(self, wall: Wall):
         """Add a wall to the world."""
         self.walls.append(wall)
+        self.wall_index.insert(wall)
+        self._geometry_changed()
+        self.rebuild_distance_field(background=True)
+
+    def add_walls(self, walls: List[Wall], background: bool = True):
+        """Add several walls at once; derived data is invalidated and rebuilt once."""
+        for wall in walls:
+            self.walls.append(wall)
+            self.wall_index.insert(wall)
+        self._geometry_changed()
+        self.rebuild_distance_field(background=background)
 
     def update(self):
-        """Update world state (currently a placeholder)."""
-        pass
+        """Per-tick upkeep, run before agents decide."""
+        if self.navigation is not None:
+            self.navigation.begin_tick()
 
     def check_collision_with_walls(self, x: float, y: float) -> bool:
         """
         Check if a point collides with any wall.
         """
-        for wall in self.walls:
+        for wall in self.wall_index.query_point(x, y):
             if wall.is_colliding(x, y):
                 return True
         return False
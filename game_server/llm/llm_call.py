@@ -3,23 +3,142 @@ import anthropic
 import os
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 from .prompts import REFORMULATION_PROMPT, BEHAVIOR_PROMPT
 from .context_handler import LLMContextHandler
+from .response_cache import ResponseCache
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Model requests in flight across the whole process
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+# Seconds a request may wait for a free slot before failing
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+# Seconds allowed for one model request
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+# Closes the part of the reformulation that code generation needs
+BEHAVIOR_BLOCK_END = "</game_behavior>"
+
+# Shared by every LLMService so resets don't raise the limit
+_request_slots = asyncio.Semaphore(LLM_MAX_CONCURRENT)
+
 class LLMService:
-    def __init__(self):
-        self.client = anthropic.Anthropic(
-            api_key=os.getenv("ANTHROPIC_API_KEY")
+    """
+    Copilot model calls over the async Anthropic client, so a slow model
+    never blocks the event loop (and with it the game loop). Requests are
+    limited process-wide and cancelled with the task awaiting them.
+    base_url (or LLM_BASE_URL) points the client at a local stand-in server.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, cache: Optional[ResponseCache] = None):
+        self.client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            base_url=base_url or os.getenv("LLM_BASE_URL") or None,
+            timeout=LLM_REQUEST_TIMEOUT,
+            max_retries=1
         )
         self.model = "claude-3-5-sonnet-20241022"
         self.max_tokens = 6980
         self.temperature = 0
         self.context_handler = LLMContextHandler()
+        # Replies are only reused when requests are deterministic
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def close(self) -> None:
+        """Close the client's HTTP connection pool"""
+        await self.client.close()
+
+    @staticmethod
+    async def _acquire_slot() -> None:
+        try:
+            await asyncio.wait_for(_request_slots.acquire(), LLM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RuntimeError("Too many copilot requests in progress, try again shortly")
+
+    def _request(self, prompt: str) -> Dict[str, Any]:
+        """Arguments for a single-message model request"""
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        if not self.cache.enabled or self.temperature != 0:
+            return None
+        return self.cache.key(self.model, prompt, max_tokens=self.max_tokens, temperature=self.temperature)
+
+    async def _complete(self, prompt: str) -> str:
+        """Send a single-message prompt and return the text of the reply (cached)"""
+        key = self._cache_key(prompt)
+        if key is None:
+            return await self._create(prompt)
+        return await self.cache.get_or_create(key, lambda: self._create(prompt))
+
+    async def _create(self, prompt: str) -> str:
+        await self._acquire_slot()
+        try:
+            message = await self.client.messages.create(**self._request(prompt))
+        finally:
+            _request_slots.release()
+        return message.content[0].text
+
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Send a single-message prompt and yield the reply's text as it arrives.
+        A cached reply (or one an identical request is producing) is yielded
+        whole.
+        """
+        key = self._cache_key(prompt)
+        if key is None:
+            async for text in self._create_stream(prompt):
+                yield text
+            return
+
+        text = self.cache.get(key)
+        if text is None:
+            text = await self.cache.wait_pending(key)
+        if text is not None:
+            yield text
+            return
+
+        self.cache.begin(key)
+        parts: List[str] = []
+        try:
+            async for text in self._create_stream(prompt):
+                parts.append(text)
+                yield text
+        except BaseException as e:
+            self.cache.fail(key, e)
+            raise
+        self.cache.finish(key, "".join(parts))
+
+    async def _create_stream(self, prompt: str) -> AsyncIterator[str]:
+        await self._acquire_slot()
+        try:
+            stream = await self.client.messages.create(**self._request(prompt), stream=True)
+            try:
+                async for event in stream:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield event.delta.text
+            finally:
+                await stream.close()
+        finally:
+            _request_slots.release()
 
     async def process_copilot_query(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Process a query from the copilot with full context awareness"""
@@ -50,40 +169,100 @@ class LLMService:
             logger.error(f"Error processing copilot query: {str(e)}")
             raise
 
+    async def stream_copilot_query(self, query: str, context: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream a copilot answer as (part, text delta) pairs, part being
+        "reformulation" or "code". Code generation starts as soon as the
+        reformulation's <game_behavior> block is complete, so the two
+        replies may interleave.
+        """
+        if not isinstance(context, dict):
+            if context is not None:
+                logger.warning(f"Invalid context type: {type(context)}")
+            context = {}
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        wants_code = self.context_handler.should_generate_code(context, query)
+
+        async def pump(part: str, prompt: str) -> None:
+            try:
+                async for text in self._stream(prompt):
+                    await queue.put((part, text))
+                await queue.put((part, None))
+            except Exception as e:
+                await queue.put((part, e))
+
+        def start_code(reformulation: str) -> None:
+            prompt = self._code_prompt(query, reformulation, context)
+            tasks.append(asyncio.create_task(pump("code", prompt)))
+
+        tasks.append(asyncio.create_task(pump("reformulation", self._reformulation_prompt(query, context))))
+        running = 1
+        reformulation = ""
+        code_started = not wants_code
+        try:
+            while running:
+                part, item = await queue.get()
+                if isinstance(item, Exception):
+                    logger.error(f"Error streaming copilot {part}: {str(item)}")
+                    raise item
+                if item is None:
+                    running -= 1
+                    if part == "reformulation" and not code_started:
+                        code_started = True
+                        running += 1
+                        start_code(reformulation)
+                    continue
+                if part == "reformulation":
+                    reformulation += item
+                    if not code_started and BEHAVIOR_BLOCK_END in reformulation:
+                        code_started = True
+                        running += 1
+                        start_code(reformulation)
+                yield part, item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _reformulation_prompt(self, description: str, context: Optional[Dict[str, Any]] = None) -> str:
+        # Format context if provided
+        context_str = ""
+        if context:
+            try:
+                context_str = self.context_handler.format_game_context(context)
+            except Exception as e:
+                logger.error(f"Error formatting context: {str(e)}")
+                context_str = str(context)
+
+        # Build prompt with context
+        prompt = REFORMULATION_PROMPT.replace("{{description}}", description)
+        if context_str:
+            prompt = f"Context:\n{context_str}\n\n{prompt}"
+        return prompt
+
+    def _code_prompt(self, description: str, reformulation: str, context: Optional[Dict[str, Any]] = None) -> str:
+        # Only the reformulation up to its behavior block, so streamed and
+        # complete replies give the same prompt (and share a cache entry)
+        end = reformulation.find(BEHAVIOR_BLOCK_END)
+        if end != -1:
+            reformulation = reformulation[:end + len(BEHAVIOR_BLOCK_END)]
+
+        # Get code-specific context if available
+        code_context = ""
+        if context:
+            code_context = self.context_handler.format_code_context(context)
+
+        # Build prompt with context
+        prompt = BEHAVIOR_PROMPT.replace("{{description}}", description).replace("{{reformulation}}", reformulation)
+        if code_context:
+            prompt = f"Code Requirements:\n{code_context}\n\n{prompt}"
+        return prompt
+
     async def generate_reformulation(self, description: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate reformulation with optional context awareness"""
         try:
-            # Format context if provided
-            context_str = ""
-            if context:
-                try:
-                    context_str = self.context_handler.format_game_context(context)
-                except Exception as e:
-                    logger.error(f"Error formatting context: {str(e)}")
-                    context_str = str(context)
-
-            # Build prompt with context
-            prompt = REFORMULATION_PROMPT.replace("{{description}}", description)
-            if context_str:
-                prompt = f"Context:\n{context_str}\n\n{prompt}"
-
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            )
-            return message.content[0].text
+            return await self._complete(self._reformulation_prompt(description, context))
             
         except Exception as e:
             logger.error(f"Error generating reformulation: {str(e)}")
@@ -92,33 +271,7 @@ class LLMService:
     async def generate_code(self, description: str, reformulation: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate code with context-aware behavior requirements"""
         try:
-            # Get code-specific context if available
-            code_context = ""
-            if context:
-                code_context = self.context_handler.format_code_context(context)
-
-            # Build prompt with context
-            prompt = BEHAVIOR_PROMPT.replace("{{description}}", description).replace("{{reformulation}}", reformulation)
-            if code_context:
-                prompt = f"Code Requirements:\n{code_context}\n\n{prompt}"
-
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            )
-            return message.content[0].text
+            return await self._complete(self._code_prompt(description, reformulation, context))
             
         except Exception as e:
             logger.error(f"Error generating code: {str(e)}")
@@ -143,6 +296,7 @@ async def test_service():
         # Test with context
         logger.info("Testing with context...")
         result = await service.process_copilot_query(test_description, test_context)
+        await service.close()
         
         print("\nReformulation:")
         print(result["reformulation"])
@@ -0,0 +1,187 @@
+# game_server/llm/response_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Where cached model replies are stored ("" disables the cache)
+LLM_CACHE_DIR = os.getenv(
+    "LLM_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "agent_game", "llm")
+)
+# Total size of cached replies before the least recently used are evicted
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Seconds a cached reply stays valid
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+class ResponseCache:
+    """
+    Content-addressed disk cache of model replies.
+    Entries are keyed by a hash of the model, request parameters and prompt,
+    stored one file per entry (written atomically) and expire max_age after
+    being written; beyond max_bytes the least recently used are evicted.
+    Identical requests in flight at the same time share one future, so only
+    the first reaches the model.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 max_age: float = LLM_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = bool(directory)
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._bytes_written = 0
+        self._evicting = False
+
+    @staticmethod
+    def key(model: str, prompt: str, **params: Any) -> str:
+        payload = json.dumps({"model": model, "prompt": prompt, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached reply for key, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created"] > self.max_age:
+                os.remove(path)
+                return None
+            text = entry["text"]
+            # mtime tracks last use for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps({"text": text, "created": time.time()})
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write LLM cache entry: {str(e)}")
+            return
+        self._bytes_written += len(data)
+        if self._bytes_written >= self.max_bytes // 8 and not self._evicting:
+            self._bytes_written = 0
+            self._schedule_eviction()
+
+    def _schedule_eviction(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.evict()
+            return
+        self._evicting = True
+        future = loop.run_in_executor(None, self.evict)
+        future.add_done_callback(lambda _: setattr(self, "_evicting", False))
+
+    def evict(self) -> None:
+        """Remove entries unused for max_age, then least recently used ones over max_bytes"""
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def wait_pending(self, key: str) -> Optional[str]:
+        """
+        Wait for an identical request already in flight. Returns None if there
+        is none, or if it was cancelled (its client left) so the caller
+        should make the request itself.
+        """
+        waiting = self._inflight.get(key)
+        if waiting is None:
+            return None
+        try:
+            text = await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            if waiting.cancelled() and not asyncio.current_task().cancelling():
+                return None
+            raise
+        self.hits += 1
+        return text
+
+    def begin(self, key: str) -> None:
+        """Mark key as being generated; later identical requests wait for it"""
+        self.misses += 1
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+
+    def finish(self, key: str, text: str) -> None:
+        self.put(key, text)
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(text)
+
+    def fail(self, key: str, error: BaseException) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            # The producer went away (task cancelled, or its stream closed
+            # early): waiters must make the request themselves, not inherit
+            # an error that was never about the request
+            if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+                future.cancel()
+            else:
+                future.set_exception(error)
+                # Nobody else may be waiting; don't warn about an unretrieved error
+                future.exception()
+
+    async def get_or_create(self, key: str, create: Callable[[], Awaitable[str]]) -> str:
+        """Cached reply, the result of an identical request in flight, or a new one"""
+        text = self.get(key)
+        if text is None:
+            text = await self.wait_pending(key)
+        if text is not None:
+            return text
+        self.begin(key)
+        try:
+            text = await create()
+        except BaseException as e:
+            self.fail(key, e)
+            raise
+        self.finish(key, text)
+        return text
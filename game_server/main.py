@@ -1,8 +1,13 @@
 # game_server/main.py
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from network.websocket import websocket_router
+from fastapi.responses import PlainTextResponse
+from network.websocket import websocket_router, manager
+from game.profiler import profiler
 from data.config_service import ConfigService
+from data.db_connector import DatabaseConnector
+from data.telemetry_service import telemetry
 from loguru import logger
 
 @asynccontextmanager
@@ -45,9 +50,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error initializing default config: {e}")
 
+    telemetry.start()
+
+    # Optional: refresh the config cache on writes from other processes
+    if os.getenv("CONFIG_CACHE_WATCH", "").lower() in ("1", "true", "yes"):
+        config_service.start_change_watch()
+
     yield
     # Shutdown: Cleanup resources
     logger.info("Game server shutting down")
+    manager.behavior_manager.shutdown()
+    await manager.llm_service.close()
+    await telemetry.close()
+    ConfigService.stop_change_watch()
+    DatabaseConnector.close()
 
 # Create FastAPI application with lifespan manager
 app = FastAPI(
@@ -58,6 +74,19 @@ app = FastAPI(
 # Include WebSocket router
 app.include_router(websocket_router)
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Tick profiler metrics in Prometheus text format"""
+    handler = manager.command_handler
+    timing = handler.game_loop.get_timing_stats()
+    return profiler.render_text({
+        "agents": len(handler.game_state.agents),
+        "connections": len(manager.active_connections),
+        "ticks": timing["ticks"],
+        "tick_overruns": timing["overruns"],
+        "dropped_ticks": timing["dropped_ticks"]
+    })
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
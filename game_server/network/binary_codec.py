@@ -0,0 +1,158 @@
+# game_server/network/binary_codec.py
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+PROTOCOL_VERSION = 3
+FRAME_SNAPSHOT = 1
+
+# version, frame type, agent count, tick, timestamp ms,
+# red_kills, blue_kills, red_agents, blue_agents, total_deaths, world version
+HEADER = struct.Struct("<BBHIQ5HI")
+# handle, x, y (quantised to GAME_BOUNDS), vx, vy (VELOCITY_SCALE units),
+# team << 4 | behavior, health, target handle
+AGENT = struct.Struct("<HHHhhBBH")
+# Velocities are sent in 1/VELOCITY_SCALE world units per second
+VELOCITY_SCALE = 10
+
+NO_HANDLE = 0xFFFF
+MAX_HANDLES = NO_HANDLE  # 0..65534
+
+TEAM_CODES = {"red": 0, "blue": 1}
+# 0 = unknown/none, 15 = custom behavior
+BEHAVIOR_CODES = {None: 0, "WANDER": 1, "WANDER_TOGETHER": 2, "ATTACK": 3, "FLEE": 4}
+BEHAVIOR_CUSTOM = 15
+
+class HandleRegistry:
+    """Maps agent UUIDs to small integer handles, reusing released ones"""
+
+    def __init__(self):
+        self.handles: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.next_handle = 0
+
+    def reset(self) -> None:
+        self.handles.clear()
+        self.free.clear()
+        self.next_handle = 0
+
+    def sync(self, agent_ids: List[str]) -> List[Tuple[int, str]]:
+        """
+        Assign handles to new ids and release handles of missing ones.
+        Returns the (handle, id) pairs assigned in this call.
+        """
+        current = set(agent_ids)
+        for agent_id in [a for a in self.handles if a not in current]:
+            self.free.append(self.handles.pop(agent_id))
+
+        assigned: List[Tuple[int, str]] = []
+        for agent_id in agent_ids:
+            if agent_id in self.handles:
+                continue
+            if self.free:
+                handle = self.free.pop()
+            elif self.next_handle < MAX_HANDLES:
+                handle = self.next_handle
+                self.next_handle += 1
+            else:
+                raise OverflowError("Out of agent handles for binary snapshots")
+            self.handles[agent_id] = handle
+            assigned.append((handle, agent_id))
+        return assigned
+
+    def get(self, agent_id: Optional[str]) -> int:
+        if agent_id is None:
+            return NO_HANDLE
+        return self.handles.get(agent_id, NO_HANDLE)
+
+    def pairs(self) -> List[Tuple[int, str]]:
+        return [(handle, agent_id) for agent_id, handle in self.handles.items()]
+
+class BinarySnapshotCodec:
+    """
+    Packs per-tick agent snapshots into compact binary frames.
+    Positions are quantised to 16 bits across the game bounds; agents are
+    referred to by handles announced separately with handles_message().
+    """
+
+    def __init__(self, bounds: Tuple[float, float, float, float]):
+        self.bounds = bounds
+        self.registry = HandleRegistry()
+
+    def reset(self) -> None:
+        self.registry.reset()
+
+    def schema(self) -> Dict[str, Any]:
+        """Everything a client needs to decode frames"""
+        return {
+            "version": PROTOCOL_VERSION,
+            "bounds": list(self.bounds),
+            "header": HEADER.format,
+            "agent": AGENT.format,
+            "no_handle": NO_HANDLE,
+            "velocity_scale": VELOCITY_SCALE,
+            "teams": {code: team for team, code in TEAM_CODES.items()},
+            "behaviors": {
+                **{code: name for name, code in BEHAVIOR_CODES.items() if name},
+                BEHAVIOR_CUSTOM: "CUSTOM"
+            }
+        }
+
+    def handles_message(self, pairs: List[Tuple[int, str]], full: bool) -> Dict[str, Any]:
+        """JSON message mapping handles to agent ids (sent before frames that use them)"""
+        data: Dict[str, Any] = {"full": full, "handles": pairs}
+        if full:
+            data["schema"] = self.schema()
+        return {"type": "agent_handles", "data": data}
+
+    def _quantise(self, value: float, low: float, high: float) -> int:
+        q = int(round((value - low) / (high - low) * 65535))
+        return 0 if q < 0 else 65535 if q > 65535 else q
+
+    def _velocity(self, value: float) -> int:
+        v = int(round(value * VELOCITY_SCALE))
+        return -32768 if v < -32768 else 32767 if v > 32767 else v
+
+    def encode(self, data: Dict[str, Any]) -> Tuple[bytes, List[Tuple[int, str]]]:
+        """
+        Encode a game_update payload.
+        Returns (frame bytes, newly assigned handle pairs).
+        """
+        agents = data["agents"]
+        assigned = self.registry.sync([agent["id"] for agent in agents])
+
+        stats = data.get("stats", {})
+        buffer = bytearray(HEADER.size + AGENT.size * len(agents))
+        HEADER.pack_into(
+            buffer, 0,
+            PROTOCOL_VERSION, FRAME_SNAPSHOT, len(agents),
+            int(data.get("tick", 0)) & 0xFFFFFFFF, int(data.get("timestamp", 0)),
+            *(min(0xFFFF, max(0, int(stats.get(key, 0)))) for key in
+              ("red_kills", "blue_kills", "red_agents", "blue_agents", "total_deaths")),
+            int(data.get("world_version") or 0) & 0xFFFFFFFF
+        )
+
+        min_x, min_y, max_x, max_y = self.bounds
+        handles = self.registry.handles
+        offset = HEADER.size
+        for agent in agents:
+            position = agent.get("position") or {"x": 0, "y": 0}
+            velocity = agent.get("velocity") or {"x": 0, "y": 0}
+            behavior = agent.get("behavior")
+            behavior_code = BEHAVIOR_CODES.get(behavior, BEHAVIOR_CUSTOM)
+            team_code = TEAM_CODES.get(agent.get("team"), 0)
+            health = int(round(agent.get("health", 0)))
+            AGENT.pack_into(
+                buffer, offset,
+                handles[agent["id"]],
+                self._quantise(position["x"], min_x, max_x),
+                self._quantise(position["y"], min_y, max_y),
+                self._velocity(velocity["x"]),
+                self._velocity(velocity["y"]),
+                (team_code << 4) | behavior_code,
+                0 if health < 0 else 255 if health > 255 else health,
+                self.registry.get(agent.get("target_id"))
+            )
+            offset += AGENT.size
+
+        return bytes(buffer), assigned
@@ -5,8 +5,14 @@ from loguru import logger
 from game.state_manager import GameState
 from game.loop import GameLoop
 from game.behavior_manager import BehaviorManager
+from game.profiler import profiler
 from llm.llm_call import LLMService
+import asyncio
 import json
+import time
+
+# Seconds between streamed copilot chunks (token deltas are merged in between)
+LLM_CHUNK_INTERVAL = 0.05
 
 class CommandHandler:
     def __init__(self, 
@@ -14,12 +20,14 @@ class CommandHandler:
                  game_loop: GameLoop,
                  behavior_manager: BehaviorManager,
                  llm_service: LLMService,
-                 broadcast_callback: Callable):
+                 broadcast_callback: Callable,
+                 snapshot_callback: Optional[Callable] = None):
         self.game_state = game_state
         self.game_loop = game_loop
         self.behavior_manager = behavior_manager
         self.llm_service = llm_service
         self.broadcast = broadcast_callback
+        self.snapshot_callback = snapshot_callback
 
     async def handle_command(self, command: Dict[str, Any]) -> None:
         """Main command routing"""
@@ -42,6 +50,7 @@ class CommandHandler:
                 "reset_game": self._handle_reset_game,
                 "update_custom_behavior": self._handle_custom_behavior,
                 "fetch_behaviors": self._handle_fetch_behaviors,
+                "get_metrics": self._handle_get_metrics,
             }
             
             handler = handlers.get(cmd_type)
@@ -86,7 +95,10 @@ class CommandHandler:
             if isinstance(context, str):
                 context = json.loads(context)
             
-            result = await self.llm_service.process_copilot_query(query, context)
+            if data.get("stream"):
+                result = await self._stream_llm_query(conversation_id, query, context)
+            else:
+                result = await self.llm_service.process_copilot_query(query, context)
             
             # Handle reformulation
             if result.get("reformulation"):
@@ -101,6 +113,39 @@ class CommandHandler:
             logger.error(f"Error processing LLM query: {str(e)}")
             await self._broadcast_llm_error(conversation_id, "Failed to process query")
 
+    async def _stream_llm_query(self, conversation_id: str, query: str, context: Any) -> Dict[str, Any]:
+        """
+        Forward the copilot answer as llm_response_chunk messages while it is
+        generated; returns the full texts for the final llm_response messages.
+        Deltas are coalesced to one message per part every LLM_CHUNK_INTERVAL.
+        """
+        result = {"reformulation": "", "code": ""}
+        pending = {"reformulation": "", "code": ""}
+        last_sent = time.monotonic()
+
+        async def flush() -> None:
+            nonlocal last_sent
+            for part, text in pending.items():
+                if text:
+                    pending[part] = ""
+                    await self.broadcast({
+                        "type": "llm_response_chunk",
+                        "data": {
+                            "conversationId": conversation_id,
+                            "part": part,
+                            "delta": text
+                        }
+                    })
+            last_sent = time.monotonic()
+
+        async for part, text in self.llm_service.stream_copilot_query(query, context):
+            result[part] += text
+            pending[part] += text
+            if time.monotonic() - last_sent >= LLM_CHUNK_INTERVAL:
+                await flush()
+        await flush()
+        return result
+
     async def _handle_load_config(self, command: Dict[str, Any]) -> None:
         """Handle config loading command"""
         config_id = command.get("config_id")
@@ -141,11 +186,11 @@ class CommandHandler:
             await self.game_loop.stop()
             
             # Create new game state
-            self.game_state = GameState()
+            self.game_state = GameState(self.behavior_manager)
             await self.game_state.initialize()  # Initialize the new state
             
             # Create new game loop
-            self.game_loop = GameLoop(self.game_state, self.broadcast)
+            self.game_loop = GameLoop(self.game_state, self.broadcast, self.snapshot_callback)
             
             # Start if there are active connections
             if self.game_loop is not None:
@@ -178,6 +223,20 @@ class CommandHandler:
             }
         })
 
+    async def _handle_get_metrics(self, command: Dict[str, Any]) -> None:
+        """Handle tick profiler metrics request"""
+        await self.broadcast({
+            "type": "metrics",
+            "data": self.get_metrics()
+        })
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Profiler snapshot plus loop timing and agent count"""
+        return profiler.snapshot({
+            "loop": self.game_loop.get_timing_stats(),
+            "agents": len(self.game_state.agents)
+        })
+
     async def _broadcast_game_state(self) -> None:
         """Helper to broadcast game state"""
         state_update = self.game_state.get_state_update()
@@ -221,21 +280,32 @@ class CommandHandler:
             })
             return
         
-        success = self.behavior_manager.add_behavior(behavior_id, code)
+        # Trial run first, off the event loop; rejected code never reaches the match
+        profile = await asyncio.to_thread(self.behavior_manager.profile_behavior, behavior_id, code)
+        success = self.behavior_manager.add_behavior(behavior_id, code, profile)
         if success:
             self.behavior_manager.assign_behavior_to_agent(agent_id, behavior_id)
+        message = None
+        if not success:
+            message = f"Behavior rejected: {profile['reason']}" if profile["status"] == "rejected" else "Failed to update behavior"
+        elif profile["status"] == "heavy":
+            message = f"Behavior is heavy: {profile['reason']}"
         await self.broadcast({
             "type": "behavior_update",
             "data": {
                 "agent_id": agent_id,
                 "status": "success" if success else "error",
-                "message": None if success else "Failed to update behavior"
+                "message": message,
+                "profile": profile
             }
         })
 
     async def _handle_fetch_behaviors(self, command: Dict[str, Any]) -> None:
         """Handle fetching all behaviors"""
-        behaviors = [{"id": k, "code": v} for k, v in self.behavior_manager.custom_behaviors.items()]
+        behaviors = [
+            {"id": k, "code": v, "profile": self.behavior_manager.behavior_profiles.get(k)}
+            for k, v in self.behavior_manager.custom_behaviors.items()
+        ]
         await self.broadcast({
             "type": "behavior_list",
             "data": {"behaviors": behaviors}
@@ -0,0 +1,102 @@
+# game_server/network/outbox.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Union
+from fastapi import WebSocket
+from loguru import logger
+from game.profiler import profiler
+
+Payload = Union[str, bytes]
+
+# Control messages a client may fall behind by before it is disconnected
+CONTROL_QUEUE_SIZE = 256
+
+class ClientOutbox:
+    """
+    Outgoing messages for one connection, drained by its own writer task.
+    Control messages are queued in order and never dropped (overflowing the
+    queue closes the connection); snapshots use a single latest-wins slot,
+    so a slow client skips stale frames instead of stalling everyone else.
+    """
+
+    def __init__(self, websocket: WebSocket,
+                 on_error: Callable[['ClientOutbox'], Awaitable[None]],
+                 control_limit: int = CONTROL_QUEUE_SIZE):
+        self.websocket = websocket
+        self.on_error = on_error
+        self.control_limit = control_limit
+        self.control: Deque[Payload] = deque()
+        self.snapshot: Optional[Payload] = None
+        self.dropped_snapshots = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    def close(self) -> None:
+        """Stop the writer; pending messages are discarded"""
+        self.closed = True
+        self.control.clear()
+        self.snapshot = None
+        self._wakeup.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    @property
+    def snapshot_pending(self) -> bool:
+        """True if the previous snapshot has not been written yet"""
+        return self.snapshot is not None
+
+    def send_control(self, payload: Payload) -> bool:
+        """Queue a message that must be delivered; False if the queue is full"""
+        if self.closed:
+            return False
+        if len(self.control) >= self.control_limit:
+            profiler.incr("control_queue_overflows")
+            return False
+        self.control.append(payload)
+        self._wakeup.set()
+        return True
+
+    def send_snapshot(self, payload: Payload) -> None:
+        """Replace any unsent snapshot with a newer one"""
+        if self.closed:
+            return
+        if self.snapshot is not None:
+            self.dropped_snapshots += 1
+            profiler.incr("snapshots_dropped")
+        self.snapshot = payload
+        self._wakeup.set()
+
+    def _next(self) -> Optional[Payload]:
+        if self.control:
+            return self.control.popleft()
+        payload, self.snapshot = self.snapshot, None
+        return payload
+
+    async def _writer(self) -> None:
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while not self.closed:
+                    payload = self._next()
+                    if payload is None:
+                        break
+                    send_start = time.perf_counter()
+                    if isinstance(payload, bytes):
+                        await self.websocket.send_bytes(payload)
+                    else:
+                        await self.websocket.send_text(payload)
+                    profiler.record("client_send", time.perf_counter() - send_start)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Client writer stopped: {e}")
+            self.closed = True
+            await self.on_error(self)
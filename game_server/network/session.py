@@ -0,0 +1,73 @@
+# game_server/network/session.py
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+from fastapi import WebSocket
+from game.constants import SNAPSHOT_RATES, DEFAULT_SNAPSHOT_TIER
+from .outbox import ClientOutbox
+
+def _flag(value: Any) -> bool:
+    """Interpret a query-string or JSON option as a boolean"""
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+@dataclass(eq=False)
+class ClientSession:
+    """Per-connection streaming options negotiated by a client"""
+    websocket: WebSocket
+    delta: bool = False            # Receive game_delta frames instead of full game_update
+    needs_keyframe: bool = True    # Next delta frame for this client must be a keyframe
+    encoding: str = "json"         # "json" or "binary" snapshot frames
+    needs_handles: bool = True     # Binary client still needs the full handle map
+    tier: str = DEFAULT_SNAPSHOT_TIER  # Snapshot rate tier (see SNAPSHOT_RATES)
+    outbox: Optional[ClientOutbox] = None
+    tasks: Set[asyncio.Task] = field(default_factory=set)  # Long-running requests (copilot)
+
+    def start_task(self, coro: Any) -> asyncio.Task:
+        """Run a request in the background; it is cancelled if the client leaves"""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def cancel_tasks(self) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+
+    def apply_options(self, options: Dict[str, Any]) -> None:
+        """Apply options from connect query parameters or set_stream_options"""
+        if "delta" in options:
+            delta = _flag(options["delta"])
+            if delta and not self.delta:
+                self.needs_keyframe = True
+            self.delta = delta
+        if "encoding" in options:
+            encoding = str(options["encoding"]).lower()
+            if encoding not in ("json", "binary"):
+                raise ValueError(f"Unsupported encoding: {encoding}")
+            if encoding == "binary" and self.encoding != "binary":
+                self.needs_handles = True
+            self.encoding = encoding
+        if "tier" in options:
+            tier = str(options["tier"]).lower()
+            if tier not in SNAPSHOT_RATES:
+                raise ValueError(f"Unknown snapshot tier: {tier}")
+            if tier != self.tier:
+                # The new tier has its own delta baseline and handle map
+                self.needs_keyframe = True
+                self.needs_handles = True
+            self.tier = tier
+
+    @property
+    def binary(self) -> bool:
+        return self.encoding == "binary"
+
+    def get_options(self) -> Dict[str, Any]:
+        return {
+            "delta": self.delta,
+            "encoding": self.encoding,
+            "tier": self.tier,
+            "snapshot_hz": SNAPSHOT_RATES[self.tier]
+        }
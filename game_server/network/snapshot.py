@@ -0,0 +1,159 @@
+# game_server/network/snapshot.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from .binary_codec import BinarySnapshotCodec
+
+# Full snapshot every N delta frames to bound drift for every client
+KEYFRAME_INTERVAL = 60
+# Minimum change before a field is re-sent in a delta frame
+DELTA_POSITION_THRESHOLD = 0.5
+DELTA_HEALTH_THRESHOLD = 0.5
+# Units per second
+DELTA_VELOCITY_THRESHOLD = 1.0
+
+class DeltaEncoder:
+    """
+    Encodes agent snapshots as deltas against the last values sent.
+    A keyframe carries every agent; delta frames carry only agents whose
+    position, health, target or behavior changed beyond a threshold,
+    plus the ids of spawned and removed agents.
+    """
+
+    def __init__(self,
+                 keyframe_interval: int = KEYFRAME_INTERVAL,
+                 position_threshold: float = DELTA_POSITION_THRESHOLD,
+                 health_threshold: float = DELTA_HEALTH_THRESHOLD,
+                 velocity_threshold: float = DELTA_VELOCITY_THRESHOLD):
+        self.keyframe_interval = keyframe_interval
+        self.position_threshold_sq = position_threshold * position_threshold
+        self.health_threshold = health_threshold
+        self.velocity_threshold_sq = velocity_threshold * velocity_threshold
+        self.baseline: Dict[str, Dict[str, Any]] = {}
+        self.sequence = 0
+        self.frames_since_keyframe = 0
+        self.force_keyframe = True
+
+    def reset(self) -> None:
+        """Forget the baseline; the next frame will be a keyframe"""
+        self.baseline.clear()
+        self.force_keyframe = True
+
+    def request_keyframe(self) -> None:
+        """Make the next encoded frame a keyframe for every client"""
+        self.force_keyframe = True
+
+    def keyframe(self, agents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Keyframe payload for the current sequence number (does not touch the baseline)"""
+        return {
+            "seq": self.sequence,
+            "keyframe": True,
+            "agents": agents,
+            "spawned": [],
+            "removed": []
+        }
+
+    def encode(self, agents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Advance one frame and return its keyframe or delta payload"""
+        self.sequence += 1
+        self.frames_since_keyframe += 1
+
+        if self.force_keyframe or self.frames_since_keyframe >= self.keyframe_interval:
+            self.force_keyframe = False
+            self.frames_since_keyframe = 0
+            self.baseline = {agent["id"]: agent for agent in agents}
+            return self.keyframe(agents)
+
+        changed: List[Dict[str, Any]] = []
+        spawned: List[str] = []
+        current_ids = set()
+
+        for agent in agents:
+            agent_id = agent["id"]
+            current_ids.add(agent_id)
+            previous = self.baseline.get(agent_id)
+            if previous is None:
+                spawned.append(agent_id)
+                changed.append(agent)
+                self.baseline[agent_id] = agent
+                continue
+
+            entry = self._diff(previous, agent)
+            if entry is not None:
+                changed.append(entry)
+
+        removed = [agent_id for agent_id in self.baseline if agent_id not in current_ids]
+        for agent_id in removed:
+            del self.baseline[agent_id]
+
+        return {
+            "seq": self.sequence,
+            "keyframe": False,
+            "agents": changed,
+            "spawned": spawned,
+            "removed": removed
+        }
+
+    def _diff(self, previous: Dict[str, Any], agent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Changed fields of an agent; updates the baseline for the fields sent"""
+        entry: Dict[str, Any] = {}
+        baseline = dict(previous)
+
+        position = agent.get("position")
+        old_position = previous.get("position")
+        if position is not None and old_position is not None:
+            dx = position["x"] - old_position["x"]
+            dy = position["y"] - old_position["y"]
+            if dx * dx + dy * dy >= self.position_threshold_sq:
+                entry["position"] = position
+                baseline["position"] = position
+
+        velocity = agent.get("velocity")
+        old_velocity = previous.get("velocity")
+        if velocity is not None and old_velocity is not None:
+            dx = velocity["x"] - old_velocity["x"]
+            dy = velocity["y"] - old_velocity["y"]
+            if dx * dx + dy * dy >= self.velocity_threshold_sq:
+                entry["velocity"] = velocity
+                baseline["velocity"] = velocity
+
+        if abs(agent.get("health", 0) - previous.get("health", 0)) >= self.health_threshold:
+            entry["health"] = agent.get("health")
+            baseline["health"] = entry["health"]
+
+        for key in ("target_id", "behavior"):
+            if agent.get(key) != previous.get(key):
+                entry[key] = agent.get(key)
+                baseline[key] = entry[key]
+
+        if not entry:
+            return None
+        entry["id"] = agent["id"]
+        self.baseline[agent["id"]] = baseline
+        return entry
+
+class SnapshotTier:
+    """
+    Publishing schedule and stream encoders shared by every client of one
+    rate tier, so clients skipping the same ticks share deltas and handles.
+    """
+
+    def __init__(self, name: str, rate: float, simulation_hz: float,
+                 bounds: Tuple[float, float, float, float]):
+        self.name = name
+        self.rate = rate
+        self.ticks_per_snapshot = max(1, round(simulation_hz / rate))
+        self.last_tick: Optional[int] = None
+        self.delta_encoder = DeltaEncoder()
+        self.binary_codec = BinarySnapshotCodec(bounds)
+
+    def due(self, tick: int) -> bool:
+        """Check if this tier should publish the snapshot of a tick"""
+        if self.last_tick is None or tick < self.last_tick:
+            return True
+        return tick - self.last_tick >= self.ticks_per_snapshot
+
+    def reset(self) -> None:
+        """Forget stream state once the tier has no clients"""
+        self.last_tick = None
+        self.delta_encoder.reset()
+        self.binary_codec.reset()
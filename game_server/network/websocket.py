@@ -1,31 +1,50 @@
 # game_server/network/websocket.py
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Set, Dict, Any
+from typing import Set, Dict, Any, Iterable, List, Optional, Union
 import json
 from loguru import logger
-from game.state_manager import GameState
+from game.state_manager import GameState, GAME_BOUNDS
 from game.loop import GameLoop
 from game.behavior_manager import BehaviorManager
+from game.profiler import profiler
+from game.constants import SIMULATION_HZ, SNAPSHOT_RATES, SANDBOX_WORKERS
+from game.sandbox.pool import BehaviorSandbox
 from llm.llm_call import LLMService
 from .command_handler import CommandHandler
+from .session import ClientSession
+from .outbox import ClientOutbox
+from .snapshot import SnapshotTier
 
 websocket_router = APIRouter()
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
+        self.sessions: Dict[WebSocket, ClientSession] = {}
+        self.snapshot_tiers: Dict[str, SnapshotTier] = {
+            name: SnapshotTier(name, rate, SIMULATION_HZ, GAME_BOUNDS)
+            for name, rate in SNAPSHOT_RATES.items()
+        }
+        # World geometry version every connected client has
+        self.world_version: Optional[int] = None
         self.initialize_services()
 
     def initialize_services(self):
         """Initialize or reinitialize all services"""
         # Initialize core services
-        self.game_state = GameState()
-        self.behavior_manager = BehaviorManager()
-        self.llm_service = LLMService()
+        if getattr(self, "behavior_manager", None) is not None:
+            # Stop the previous sandbox workers before replacing them
+            self.behavior_manager.shutdown()
+        sandbox = BehaviorSandbox(SANDBOX_WORKERS) if SANDBOX_WORKERS > 0 else None
+        self.behavior_manager = BehaviorManager(sandbox=sandbox)
+        self.game_state = GameState(self.behavior_manager)
+        if getattr(self, "llm_service", None) is None:
+            # Kept across resets: it holds no game state, only the HTTP client
+            self.llm_service = LLMService()
         
         # Initialize game loop with broadcast callback
-        self.game_loop = GameLoop(self.game_state, self.broadcast)
+        self.game_loop = GameLoop(self.game_state, self.broadcast, self.publish_snapshot)
         
         # Initialize command handler
         self.command_handler = CommandHandler(
@@ -33,7 +52,8 @@ class ConnectionManager:
             game_loop=self.game_loop,
             behavior_manager=self.behavior_manager,
             llm_service=self.llm_service,
-            broadcast_callback=self.broadcast
+            broadcast_callback=self.broadcast,
+            snapshot_callback=self.publish_snapshot
         )
 
     async def connect(self, websocket: WebSocket) -> None:
@@ -41,10 +61,20 @@ class ConnectionManager:
         try:
             await websocket.accept()
             self.active_connections.add(websocket)
+            session = ClientSession(websocket)
+            try:
+                session.apply_options(dict(websocket.query_params))
+            except ValueError as e:
+                logger.warning(f"Ignoring stream options: {e}")
+            session.outbox = ClientOutbox(websocket, self._on_writer_error)
+            session.outbox.start()
+            self.sessions[websocket] = session
             logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
             
             # Start game loop if first connection
             if len(self.active_connections) == 1:
+                # The initial state below carries the walls
+                self.world_version = self.game_state.world_state.version
                 await self.game_loop.start()
             
             # Send initial state
@@ -55,13 +85,16 @@ class ConnectionManager:
                     "agents": [agent.to_dict() for agent in self.game_state.agents.values()]
                 }
             }
-            await websocket.send_json(initial_state)
+            await self._send_to([websocket], initial_state)
             logger.debug(f"Sent initial state: {initial_state}")
             
         except Exception as e:
             logger.exception(f"Error during connection: {e}")
             if websocket in self.active_connections:
                 self.active_connections.remove(websocket)
+            session = self.sessions.pop(websocket, None)
+            if session is not None and session.outbox is not None:
+                session.outbox.close()
             raise
 
     async def reset_game_state(self):
@@ -91,6 +124,12 @@ class ConnectionManager:
 
     async def disconnect(self, websocket: WebSocket) -> None:
         """Handle WebSocket disconnection"""
+        session = self.sessions.pop(websocket, None)
+        if session is not None:
+            # Nobody is left to read the answer; stop paying for the model call
+            session.cancel_tasks()
+            if session.outbox is not None:
+                session.outbox.close()
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
@@ -103,26 +142,199 @@ class ConnectionManager:
         """Broadcast message to all connected clients"""
         if not self.active_connections:
             return
-            
-        disconnected = set()
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                disconnected.add(connection)
-            except Exception as e:
-                logger.exception(f"Error broadcasting to client: {e}")
-                disconnected.add(connection)
-        
-        # Clean up disconnected clients
-        for connection in disconnected:
-            await self.disconnect(connection)
+        await self._send_to(list(self.active_connections), message)
 
-    async def handle_command(self, command: Dict[str, Any]) -> None:
+    async def publish_snapshot(self, data: Dict[str, Any]) -> None:
+        """
+        Send an agent snapshot to every client whose rate tier is due, in
+        the format it negotiated: full game_update, game_delta or binary frames.
+        """
+        if not self.active_connections:
+            return
+
+        world_version = data.get("world_version")
+        if world_version is not None and world_version != self.world_version:
+            await self._publish_world(world_version)
+
+        by_tier: Dict[str, List[ClientSession]] = {}
+        for websocket in list(self.active_connections):
+            session = self.sessions.get(websocket)
+            if session is not None:
+                by_tier.setdefault(session.tier, []).append(session)
+
+        tick = data.get("tick", 0)
+        encoded: Dict[str, str] = {}  # Full game_update shared between tiers
+        for name, tier in self.snapshot_tiers.items():
+            sessions = by_tier.get(name)
+            if not sessions:
+                tier.reset()
+                continue
+            if not tier.due(tick):
+                continue
+            tier.last_tick = tick
+            await self._publish_tier(tier, sessions, data, encoded)
+
+    async def _publish_world(self, version: int) -> None:
+        """Send the walls to every client after the geometry changed"""
+        # A reset_game replaces the command handler's game, not self.game_state;
+        # the handler's game is the one producing snapshots
+        world_state = self.command_handler.game_state.world_state
+        if world_state.version != version:
+            logger.debug(f"Snapshot world version {version} is stale; sending version {world_state.version}")
+            version = world_state.version
+        # Reuse the cached world encoding instead of re-serializing the walls
+        payload = '{"type":"world_update","data":' + world_state.get_encoded_state() + '}'
+        profiler.incr("bytes_serialized", len(payload))
+        await self._send_payload(list(self.active_connections), payload)
+        self.world_version = version
+
+    async def _publish_tier(self, tier: SnapshotTier, sessions: List[ClientSession],
+                            data: Dict[str, Any], encoded: Dict[str, str]) -> None:
+        """Publish one snapshot to the clients of a tier"""
+        full_sessions: List[ClientSession] = []
+        delta_sessions: List[ClientSession] = []
+        binary_sessions: List[ClientSession] = []
+        for session in sessions:
+            if session.binary:
+                binary_sessions.append(session)
+            elif session.delta:
+                delta_sessions.append(session)
+            else:
+                full_sessions.append(session)
+
+        if full_sessions:
+            if "game_update" not in encoded:
+                encoded["game_update"] = self._encode({"type": "game_update", "data": data})
+            self._send_snapshot(full_sessions, encoded["game_update"])
+
+        if binary_sessions:
+            await self._publish_binary(tier, binary_sessions, data)
+        else:
+            tier.binary_codec.reset()
+
+        if not delta_sessions:
+            # Nobody consumes deltas; start from a keyframe when someone does
+            tier.delta_encoder.reset()
+            return
+
+        frame = tier.delta_encoder.encode(data["agents"])
+        header = {
+            "tick": data.get("tick", 0),
+            "timestamp": data["timestamp"],
+            "stats": data["stats"],
+            "world_version": data.get("world_version")
+        }
+        delta_clients: List[ClientSession] = []
+        keyframe_clients: List[ClientSession] = []
+        for session in delta_sessions:
+            # A client whose previous frame is still unsent would lose that
+            # delta when it is replaced, so it gets a keyframe instead
+            behind = session.outbox is not None and session.outbox.snapshot_pending
+            if (session.needs_keyframe or behind) and not frame["keyframe"]:
+                keyframe_clients.append(session)
+            else:
+                delta_clients.append(session)
+            session.needs_keyframe = False
+
+        if delta_clients:
+            payload = self._encode({"type": "game_delta", "data": {**header, **frame}})
+            self._send_snapshot(delta_clients, payload)
+        if keyframe_clients:
+            keyframe = tier.delta_encoder.keyframe(data["agents"])
+            payload = self._encode({"type": "game_delta", "data": {**header, **keyframe}})
+            self._send_snapshot(keyframe_clients, payload)
+
+    async def _publish_binary(self, tier: SnapshotTier, sessions: List[ClientSession],
+                              data: Dict[str, Any]) -> None:
+        """Send a binary frame, preceded by any handle mappings clients are missing"""
+        codec = tier.binary_codec
+        frame, assigned = codec.encode(data)
+
+        needs_full = [s.websocket for s in sessions if s.needs_handles]
+        up_to_date = [s.websocket for s in sessions if not s.needs_handles]
+        if needs_full:
+            await self._send_to(needs_full, codec.handles_message(codec.registry.pairs(), full=True))
+            for session in sessions:
+                session.needs_handles = False
+        if assigned and up_to_date:
+            await self._send_to(up_to_date, codec.handles_message(assigned, full=False))
+
+        profiler.incr("bytes_serialized", len(frame))
+        self._send_snapshot(sessions, frame)
+
+    def _encode(self, message: Dict[str, Any]) -> str:
+        """Encode a message once for any number of clients"""
+        payload = json.dumps(message, separators=(",", ":"))
+        # ASCII JSON, so len == bytes
+        profiler.incr("bytes_serialized", len(payload))
+        return payload
+
+    def _send_snapshot(self, sessions: Iterable[Optional[ClientSession]], payload: Union[str, bytes]) -> None:
+        """Offer a snapshot to each client's latest-wins slot"""
+        for session in sessions:
+            if session is not None and session.outbox is not None:
+                session.outbox.send_snapshot(payload)
+
+    async def _send_to(self, connections: Iterable[WebSocket], message: Dict[str, Any]) -> None:
+        """Encode a message once and queue it for the given clients"""
+        await self._send_payload(connections, self._encode(message))
+
+    async def _send_payload(self, connections: Iterable[WebSocket], payload: Union[str, bytes]) -> None:
+        """Queue an already encoded control message; it is never dropped"""
+        overflowed = []
+        for connection in connections:
+            session = self.sessions.get(connection)
+            if session is None or session.outbox is None:
+                continue
+            if not session.outbox.send_control(payload):
+                overflowed.append(connection)
+
+        # A client that cannot keep up with control messages is out of sync
+        for connection in overflowed:
+            logger.warning("Client control queue overflowed, disconnecting")
+            await self._drop_client(connection)
+
+    async def _on_writer_error(self, outbox: ClientOutbox) -> None:
+        await self._drop_client(outbox.websocket)
+
+    async def _drop_client(self, websocket: WebSocket) -> None:
+        """Disconnect a client from the server side"""
+        await self.disconnect(websocket)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def handle_command(self, command: Dict[str, Any], websocket: Optional[WebSocket] = None) -> None:
         """Route command to command handler"""
+        session = self.sessions.get(websocket) if websocket is not None else None
+        if session is not None and command.get("type") in ("set_stream_options", "request_resync"):
+            await self._handle_session_command(session, command)
+            return
+        if session is not None and command.get("type") == "llm_query":
+            # Model calls take seconds; keep reading this client's commands meanwhile
+            session.start_task(self.command_handler.handle_command(command))
+            return
         await self.command_handler.handle_command(command)
 
+    async def _handle_session_command(self, session: ClientSession, command: Dict[str, Any]) -> None:
+        """Handle commands that only affect the sending connection"""
+        if command["type"] == "set_stream_options":
+            try:
+                session.apply_options(command.get("options", {}))
+                data = session.get_options()
+            except ValueError as e:
+                data = {**session.get_options(), "error": str(e)}
+            await self._send_to([session.websocket], {
+                "type": "stream_options",
+                "data": data
+            })
+        elif command["type"] == "request_resync":
+            # Only this client gets a keyframe (or handle map); others keep their stream
+            session.needs_keyframe = True
+            session.needs_handles = True
+            logger.debug("Client requested snapshot resync")
+
 manager = ConnectionManager()
 
 @websocket_router.websocket("/ws")
@@ -134,7 +346,7 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
             try:
                 data = await websocket.receive_text()
                 command = json.loads(data)
-                await manager.handle_command(command)
+                await manager.handle_command(command, websocket)
             except WebSocketDisconnect:
                 logger.info("Client disconnected")
                 break